@@ -0,0 +1,49 @@
+import sys
+import time
+from src import spotify_utils
+from src.rate_limiter import SpotifyRateLimiter
+from src.spotify_standin import SpotifyStandIn, SYNTHETIC_PREFIX, STANDIN_TOKEN_CACHE_PATH
+
+# Offline benchmark of the streaming playlist fetch (iter_playlist_tracks) against the local Spotify stand-in.
+# Usage: python import_benchmark.py [playlist sizes...]   e.g. 10 10000 100000
+
+PLAYLIST_SIZES = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000]
+LATENCY_SECONDS = 0.02  # per API response, roughly a nearby datacenter
+RATE_LIMIT_RATIO = 0.01  # share of requests answered with 429
+SERVER_ERROR_RATIO = 0.01  # share of requests answered with 503
+MAX_REQUESTS_PER_SECOND = 1000  # high enough that the client, not the pacing, is measured
+
+def benchmark(app_state, sp, size):
+    """Fetch one synthetic playlist and return (seconds, tracks fetched)."""
+    url = f"https://open.spotify.com/playlist/{SYNTHETIC_PREFIX}{size}"
+    start = time.perf_counter()
+    fetched = sum(1 for _ in spotify_utils.iter_playlist_tracks(app_state, sp, url, desired_count=size))
+    return time.perf_counter() - start, fetched
+
+if __name__ == "__main__":
+    spotify_utils.rate_limiter = SpotifyRateLimiter(
+        max_rate=MAX_REQUESTS_PER_SECOND, backoff_base=0.05, backoff_max=0.5
+    )
+    with SpotifyStandIn(
+            latency=LATENCY_SECONDS,
+            rate_limit_ratio=RATE_LIMIT_RATIO,
+            server_error_ratio=SERVER_ERROR_RATIO,
+            retry_after=0) as standin:
+        app_state = {"logs": []}
+        sp = spotify_utils.init_spotify_client(
+            app_state, api_url=standin.api_url, auth_url=standin.auth_url, token_cache_path=STANDIN_TOKEN_CACHE_PATH
+        )
+        results = []
+        for size in PLAYLIST_SIZES:
+            requests_before = standin.stats["requests"]
+            seconds, fetched = benchmark(app_state, sp, size)
+            results.append((size, fetched, seconds, standin.stats["requests"] - requests_before))
+
+    print(f"[INFO] latency={LATENCY_SECONDS * 1000:.0f}ms, 429={RATE_LIMIT_RATIO:.0%}, 503={SERVER_ERROR_RATIO:.0%}")
+    for size, fetched, seconds, request_count in results:
+        print(
+            f"{size:>8} tracks: {seconds:7.2f}s, {fetched / seconds:9.0f} tracks/s, "
+            f"{request_count} requests{'' if fetched == size else f' (only {fetched} fetched)'}"
+        )
+    throttled, retries, rate_limited = spotify_utils.rate_limiter.stats()
+    print(f"[INFO] {retries} retries ({rate_limited} rate limited), {throttled:.1f}s throttled")
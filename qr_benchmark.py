@@ -0,0 +1,40 @@
+import sys
+import time
+import statistics
+from src.card_utils import CARD_QR_OPTIONS, generate_custom_qr_data_uri
+
+# Micro-benchmark of the QR rendering paths used on the card backs.
+# Usage: python qr_benchmark.py [number_of_codes]
+
+CODE_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+FORMATS = ["png", "bitmap", "svg"]
+
+def sample_urls(count):
+    """Deterministic Spotify-like track URLs."""
+    return [f"https://open.spotify.com/track/{i:022d}" for i in range(count)]
+
+def benchmark(qr_format, urls):
+    """Render every URL once and return (seconds per code, average output size in bytes)."""
+    options = dict(CARD_QR_OPTIONS, qr_format=qr_format)
+    generate_custom_qr_data_uri(urls[0], **options)  # warm-up
+    timings = []
+    sizes = []
+    for url in urls:
+        start = time.perf_counter()
+        output = generate_custom_qr_data_uri(url, **options)
+        timings.append(time.perf_counter() - start)
+        sizes.append(len(output))
+    return statistics.mean(timings), statistics.mean(sizes)
+
+if __name__ == "__main__":
+    urls = sample_urls(CODE_COUNT)
+    print(f"[INFO] Rendering {CODE_COUNT} QR codes per format...")
+    baseline_time = baseline_size = None
+    for qr_format in FORMATS:
+        per_code, avg_size = benchmark(qr_format, urls)
+        if baseline_time is None:
+            baseline_time, baseline_size = per_code, avg_size
+        print(
+            f"{qr_format:>7}: {per_code * 1000:7.2f} ms/code ({baseline_time / per_code:5.1f}x), "
+            f"{avg_size / 1024:7.1f} KB/code ({baseline_size / avg_size:5.1f}x smaller)"
+        )
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .track_importer import import_tracks
+from .spotify_utils import extract_id_from_url
+from .constants import BATCH_IMPORT_WORKERS
+from .logger import log_info, log_error, log_success
+
+def import_one_playlist(app_state, sp, playlist_url, track_count):
+    """
+    Import a single playlist for a batch and return a result dict with its
+    CSV path, track count and wall time. Failures are recorded in the result
+    instead of being raised, so one bad playlist doesn't stop the batch.
+    """
+    started = time.perf_counter()
+    result = {"url": playlist_url, "csv": None, "tracks": 0, "seconds": 0.0, "error": None}
+    try:
+        result["csv"], _, result["tracks"] = import_tracks(
+            app_state, sp, playlist_url, track_count, show_progress=False
+        )
+    except Exception as e:
+        result["error"] = str(e)
+        log_error(app_state, f"Failed to import {playlist_url}: {e}")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def import_playlists(app_state, sp, playlist_urls, track_count, workers=BATCH_IMPORT_WORKERS):
+    """
+    Import several playlists concurrently over the shared client `sp`, writing
+    one CSV per playlist exactly like a single import. A playlist given more
+    than once (e.g. with and without ?si=) is imported once. Returns the
+    per-playlist results in input order.
+    """
+    unique_urls = {}
+    for url in playlist_urls:
+        unique_urls.setdefault(extract_id_from_url(url), url)
+    if len(unique_urls) < len(playlist_urls):
+        log_info(app_state, f"Skipping {len(playlist_urls) - len(unique_urls)} duplicate playlist URLs")
+    playlist_urls = list(unique_urls.values())
+    log_info(app_state, f"Batch importing {len(playlist_urls)} playlists with {workers} workers")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(
+            lambda url: import_one_playlist(app_state, sp, url, track_count),
+            playlist_urls
+        ))
+
+def report_batch_import(app_state, results, elapsed):
+    """Log one line per playlist (tracks, time, CSV or error) and a batch summary."""
+    for result in results:
+        if result["error"]:
+            log_error(app_state, f"{result['url']}: failed after {result['seconds']:.1f}s ({result['error']})")
+        else:
+            log_info(app_state, f"{result['csv']}: {result['tracks']} tracks in {result['seconds']:.1f}s")
+    succeeded = [result for result in results if not result["error"]]
+    summary = (
+        f"Batch import: {len(succeeded)} of {len(results)} playlists, "
+        f"{sum(result['tracks'] for result in succeeded)} tracks in {elapsed:.1f}s"
+    )
+    log_success(app_state, summary)
+    return summary
@@ -0,0 +1,130 @@
+import os
+import mmap
+import struct
+
+# Compact binary twin of a tracks CSV (<name>_tracks.deck next to <name>_tracks.csv):
+#
+#   header        magic, version, record size, record count, offset of the record table
+#   string table  UTF-8 serial numbers, artists, song names and URLs, back to back
+#   record table  one fixed-width record per card: the offset of its strings in
+#                 the string table (stored back to back), their four byte lengths,
+#                 and the year as an integer (0 = unknown)
+#
+# Readers mmap the file, so opening a 100k-card deck costs one header read and
+# rows are decoded straight from the mapping as they are consumed.
+
+DECK_MAGIC = b"HDCK"
+DECK_VERSION = 1
+DECK_EXTENSION = ".deck"
+HEADER = struct.Struct("<4sHHIQ")
+RECORD = struct.Struct("<I4HH")  # string lengths are capped at 64 KB each
+
+def deck_path_for(csv_path):
+    """Path of the binary deck stored alongside `csv_path`."""
+    return os.path.splitext(csv_path)[0] + DECK_EXTENSION
+
+def encode_year(year):
+    return int(year) if str(year).isdigit() else 0
+
+def decode_year(year):
+    return str(year) if year else "Unknown"
+
+class BinaryDeckWriter:
+    """
+    Stream cards into a binary deck. Strings go straight to disk; only the
+    fixed-width records are buffered. The file is replaced atomically on
+    close(), and discarded if the writer is left through an exception.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.file = open(self.temp_path, "wb")
+        self.file.write(b"\0" * HEADER.size)  # placeholder, rewritten on close
+        self.string_offset = 0
+        self.records = bytearray()
+        self.count = 0
+
+    def add(self, serial_number, artist, song_name, year, url):
+        strings = [value.encode("utf-8") for value in (serial_number, artist, song_name, url)]
+        self.records += RECORD.pack(self.string_offset, *(len(data) for data in strings), encode_year(year))
+        for data in strings:
+            self.file.write(data)
+            self.string_offset += len(data)
+        self.count += 1
+
+    def close(self):
+        records_offset = HEADER.size + self.string_offset
+        self.file.write(self.records)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(DECK_MAGIC, DECK_VERSION, RECORD.size, self.count, records_offset))
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+class BinaryDeck:
+    """
+    Read-only view of a binary deck, usable as a track source for card
+    generation. count() only reads the header; iter_records() yields
+    (serial_number, artist, song_name, year, url) tuples from an mmap.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"Truncated deck file: {path}")
+        magic, version, record_size, self.record_count, self.records_offset = HEADER.unpack(header)
+        if magic != DECK_MAGIC or version != DECK_VERSION or record_size != RECORD.size:
+            raise ValueError(f"Unsupported deck file: {path}")
+
+    def count(self):
+        return self.record_count
+
+    def iter_records(self):
+        if self.record_count == 0:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            strings = HEADER.size
+            records = memoryview(mapped)[self.records_offset:self.records_offset + self.record_count * RECORD.size]
+            try:
+                for offset, serial_len, artist_len, song_len, url_len, year in RECORD.iter_unpack(records):
+                    start = strings + offset
+                    artist_at = start + serial_len
+                    song_at = artist_at + artist_len
+                    url_at = song_at + song_len
+                    yield (
+                        mapped[start:artist_at].decode("utf-8"),
+                        mapped[artist_at:song_at].decode("utf-8"),
+                        mapped[song_at:url_at].decode("utf-8"),
+                        decode_year(year),
+                        mapped[url_at:url_at + url_len].decode("utf-8"),
+                    )
+            finally:
+                records.release()
+
+def open_deck_for_csv(csv_path):
+    """
+    The binary deck written alongside `csv_path`, or None if there is none or
+    it is older than the CSV (e.g. the CSV was edited by hand) or unreadable.
+    """
+    path = deck_path_for(csv_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(csv_path):
+            return None
+        return BinaryDeck(path)
+    except (OSError, ValueError):
+        return None
@@ -1,19 +1,47 @@
 import os
 import csv
 import io
+import math
+import itertools
 import qrcode
 import random
 import base64
+import shutil
+import mimetypes
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from jinja2 import Template
 from .logger import log_info, log_error, log_success
-from PIL import Image
+from PIL import Image, ImageColor
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles.moduledrawers.pil import SquareModuleDrawer  # Use square style
-from .constants import BACKGROUND_IMAGE_PATH, BACKGROUND_IMAGE_PLACEHOLDER
+from .constants import (
+    BACKGROUND_IMAGE_PATH,
+    BACKGROUND_IMAGE_PLACEHOLDER,
+    CARD_CSS_PATH,
+    CARD_BACK_CSS_PATH,
+    ASSET_MODE_LINKED,
+    ASSET_MODE_EMBEDDED,
+    DEFAULT_ASSET_MODE,
+    BACKGROUND_DPI,
+    BACKGROUND_FORMAT,
+    QR_WORKERS,
+    QR_PARALLEL_THRESHOLD,
+    QR_FORMAT,
+    OUTPUT_LAYOUT_PAGES,
+    OUTPUT_LAYOUT_DECK,
+    DEFAULT_OUTPUT_LAYOUT,
+)
+from .image_utils import prepare_background_image, hash_file
+from .qr_cache import QRCodeCache
+from .deck_manifest import DeckManifest
+from .binary_deck import open_deck_for_csv
+from .output_store import detach_output_file
 
-def generate_random_gradient():
+def pick_random_gradient():
     """
-    Generate gradients with smooth, offset transitions and print-friendly colors.
+    Pick a random print-friendly gradient.
+    Returns (direction_degrees, [(color, offset_percent), ...]) in CSS terms.
     """
     color_groups = [
         ["#E57373", "#F06292", "#BA68C8"],  # Rich pinks and purples
@@ -38,14 +66,23 @@ def generate_random_gradient():
     offset2 = random.randint(40, 60)  # Larger shift for the middle stop
     offset3 = random.randint(80, 100)  # End stop near the edge
 
-    return f"linear-gradient({direction}deg, {c1} {offset1}%, {c2} {offset2}%, {c3} {offset3}%)"
+    return direction, [(c1, offset1), (c2, offset2), (c3, offset3)]
+
+def generate_random_gradient():
+    """
+    Generate gradients with smooth, offset transitions and print-friendly colors.
+    """
+    direction, stops = pick_random_gradient()
+    stops_css = ", ".join(f"{color} {offset}%" for color, offset in stops)
+    return f"linear-gradient({direction}deg, {stops_css})"
 
 def embed_image_as_base64(image_path):
     """Convert an image to a Base64 string for embedding in CSS."""
     try:
+        mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
         with open(image_path, "rb") as img_file:
             encoded_string = base64.b64encode(img_file.read()).decode("utf-8")
-        return f"data:image/png;base64,{encoded_string}"
+        return f"data:{mime_type};base64,{encoded_string}"
     except Exception as e:
         raise FileNotFoundError(f"Could not embed image. Error: {e}")
 
@@ -61,11 +98,102 @@ def embed_css_with_background(css_path, background_image_path):
     except Exception as e:
         raise FileNotFoundError(f"Could not embed CSS or image. Error: {e}")
 
+def write_linked_assets(output_dir, background_image_path):
+    """
+    Write cards.css, cards_back.css and the background image into `output_dir`
+    so every page in it can reference them relatively.
+    """
+    try:
+        background_name = os.path.basename(background_image_path)
+        css_path = os.path.join(output_dir, "cards.css")
+        background_copy_path = os.path.join(output_dir, background_name)
+        back_css_path = os.path.join(output_dir, "cards_back.css")
+        for path in (css_path, background_copy_path, back_css_path):
+            detach_output_file(path)
+        shutil.copyfile(CARD_CSS_PATH, css_path)
+        shutil.copyfile(background_image_path, background_copy_path)
+        with open(CARD_BACK_CSS_PATH, "r", encoding="utf-8") as f:
+            back_css = f.read()
+        back_css = back_css.replace(BACKGROUND_IMAGE_PLACEHOLDER, background_name)
+        with open(back_css_path, "w", encoding="utf-8") as f:
+            f.write(back_css)
+    except Exception as e:
+        raise FileNotFoundError(f"Could not write linked CSS or image. Error: {e}")
+
+def build_page_styles(output_dir, background_image_path, asset_mode=DEFAULT_ASSET_MODE):
+    """
+    Return the (front, back) <head> snippets for the card pages.
+
+    In linked mode the shared assets are written into `output_dir` once and the
+    snippets are <link> tags; in embedded mode they are inline <style> blocks.
+    Only the back snippet carries the background rule.
+    """
+    if asset_mode == ASSET_MODE_LINKED:
+        write_linked_assets(output_dir, background_image_path)
+        front_styles = '<link rel="stylesheet" href="cards.css" />'
+        back_styles = front_styles + '\n    <link rel="stylesheet" href="cards_back.css" />'
+        return front_styles, back_styles
+
+    if asset_mode == ASSET_MODE_EMBEDDED:
+        with open(CARD_CSS_PATH, "r", encoding="utf-8") as f:
+            front_styles = f"<style>\n{f.read()}\n</style>"
+        back_styles = front_styles + "\n" + embed_css_with_background(CARD_BACK_CSS_PATH, background_image_path)
+        return front_styles, back_styles
+
+    raise ValueError(f"Unknown asset mode: {asset_mode}")
+
 def chunk_list(lst, size):
     """Yield successive chunks of size `size` from list `lst`."""
     for i in range(0, len(lst), size):
         yield lst[i:i+size]
 
+def chunk_iterable(iterable, size):
+    """Yield successive lists of up to `size` items from any (lazy) iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def mirror_columns_per_row(items, columns=3):
+    """Mirror left↔right order within each visual row, keeping row order."""
+    mirrored = []
+    for row in chunk_list(items, columns):
+        mirrored.extend(list(reversed(row)))
+    return mirrored
+
+def load_template(template_path):
+    """Read a Jinja2 template from disk."""
+    with open(template_path, "r", encoding="utf-8") as f:
+        return Template(f.read())
+
+def write_deck_html(deck_path, deck_template, pages, page_styles, total_pages):
+    """
+    Stream the (page_number, page_tracks) `pages` as one document to `deck_path`. Template.generate() yields
+    the output piece by piece, so the whole document is never held in memory.
+    """
+    deck_pages = (
+        {"number": i, "front": page_tracks, "back": mirror_columns_per_row(page_tracks, columns=3)}
+        for i, page_tracks in pages
+    )
+    detach_output_file(deck_path)
+    with open(deck_path, "w", encoding="utf-8") as f:
+        for chunk in deck_template.generate(pages=deck_pages, page_styles=page_styles, total_pages=total_pages):
+            f.write(chunk)
+
+def build_qr_code(url, version=None, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=4, border=2):
+    """Encode `url` into a fitted qrcode.QRCode; qr.get_matrix() gives the modules (border included)."""
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=error_correction,
+        box_size=box_size,
+        border=border
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
 def generate_custom_qr_data_uri(
         url,
         version=None,
@@ -74,10 +202,12 @@ def generate_custom_qr_data_uri(
         border=2,
         fill_color="black",
         back_color=(255, 255, 255),  # White background as RGB tuple
-        output_size=(300, 300)):
+        output_size=(300, 300),
+        qr_format="png"):
     """
     Generate a square QR code for `url` with a white background and customizable parameters.
-    Returns a data URI (Base64-encoded PNG).
+    Returns a data URI (Base64-encoded PNG), or inline SVG markup when qr_format="svg".
+    qr_format="bitmap" takes the fast path: an exact-size 1-bit palette PNG.
 
     Parameters:
       - url: The URL to encode.
@@ -87,10 +217,13 @@ def generate_custom_qr_data_uri(
       - border: Number of modules for the border.
       - fill_color: Color for the QR modules.
       - back_color: Background color (set to white as an RGB tuple).
-      - output_size: Tuple (width, height) to resize the final image.
+      - output_size: Tuple (width, height) to resize the final image (PNG only).
+      - qr_format: "png" for a styled raster data URI, "bitmap" for a 1-bit PNG
+        data URI, "svg" for an inline vector <svg>.
 
     Returns:
-      A data URI (string) containing the Base64-encoded PNG of the generated QR code.
+      A data URI (string) containing the Base64-encoded PNG of the generated QR code,
+      or an <svg> element string for qr_format="svg".
     """
     import qrcode
     from qrcode.image.styledpil import StyledPilImage
@@ -99,14 +232,14 @@ def generate_custom_qr_data_uri(
     # Use SquareModuleDrawer by default for a standard square QR code.
     module_drawer = SquareModuleDrawer()
     
-    qr = qrcode.QRCode(
-        version=version,
-        error_correction=error_correction,
-        box_size=box_size,
-        border=border
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
+    qr = build_qr_code(url, version, error_correction, box_size, border)
+
+    if qr_format == "svg":
+        return qr_matrix_to_svg(qr.get_matrix(), fill_color, back_color)
+    if qr_format == "bitmap":
+        return qr_matrix_to_bitmap_data_uri(qr.get_matrix(), fill_color, back_color, output_size)
+    if qr_format != "png":
+        raise ValueError(f"Unknown QR format: {qr_format}")
     
     # Generate the QR code image using StyledPilImage.
     img = qr.make_image(
@@ -125,6 +258,130 @@ def generate_custom_qr_data_uri(
     encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
     return f"data:image/png;base64,{encoded}"
 
+def css_color(color):
+    """Format a color name or RGB(A) tuple for use in SVG/CSS."""
+    if isinstance(color, (tuple, list)):
+        return f"rgb({color[0]},{color[1]},{color[2]})"
+    return color
+
+def qr_matrix_to_svg(matrix, fill_color="black", back_color=(255, 255, 255)):
+    """
+    Render a QR module matrix (rows of booleans, border included) as a compact
+    inline SVG. Horizontal runs of dark modules are merged into one rectangle
+    each, and all of them share a single <path>.
+    """
+    size = len(matrix)
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            width = x - start
+            segments.append(f"M{start} {y}h{width}v1h-{width}z")
+    return (
+        f'<svg class="qr-code" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'shape-rendering="crispEdges" role="img" aria-label="QR Code">'
+        f'<rect width="{size}" height="{size}" fill="{css_color(back_color)}"/>'
+        f'<path fill="{css_color(fill_color)}" d="{"".join(segments)}"/></svg>'
+    )
+
+def qr_matrix_to_bitmap_data_uri(matrix, fill_color="black", back_color=(255, 255, 255), output_size=(300, 300)):
+    """
+    Fast raster path: blow the QR module matrix up to `output_size` with an
+    integer nearest-neighbour scale (NumPy), pad the remainder with background
+    and encode it as a two-color palette PNG, which Pillow writes at 1 bit per
+    pixel. Module edges stay perfectly sharp and the PNG is a fraction of the
+    size of the styled RGBA one.
+    """
+    modules = np.asarray(matrix, dtype=np.uint8)  # 1 = dark module
+    size = modules.shape[0]
+    target_w, target_h = output_size if output_size is not None else (size, size)
+    scale = max(1, min(target_w, target_h) // size)
+    pixels = np.repeat(np.repeat(modules, scale, axis=0), scale, axis=1)
+
+    # Center the scaled code; the padding is extra quiet zone.
+    pad_y = max(0, target_h - pixels.shape[0])
+    pad_x = max(0, target_w - pixels.shape[1])
+    pixels = np.pad(pixels, ((pad_y // 2, pad_y - pad_y // 2), (pad_x // 2, pad_x - pad_x // 2)))
+
+    img = Image.fromarray(pixels, mode="P")
+    back_rgb = ImageColor.getrgb(back_color) if isinstance(back_color, str) else tuple(back_color[:3])
+    fill_rgb = ImageColor.getrgb(fill_color) if isinstance(fill_color, str) else tuple(fill_color[:3])
+    img.putpalette(list(back_rgb) + list(fill_rgb))
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return f"data:image/png;base64,{encoded}"
+
+# Rendering options for the QR codes on the card backs.
+CARD_QR_OPTIONS = {
+    "version": None,
+    "error_correction": qrcode.constants.ERROR_CORRECT_H,
+    "box_size": 4,
+    "border": 2,
+    "fill_color": "black",
+    "back_color": (255, 255, 255),  # White background
+    "output_size": (300, 300),
+    "qr_format": QR_FORMAT,
+}
+
+def _render_qr_worker(job):
+    """Process-pool entry point: render one (url, qr_options) job."""
+    url, qr_options = job
+    return generate_custom_qr_data_uri(url, **qr_options)
+
+def resolve_qr_workers(card_count, workers=QR_WORKERS, threshold=QR_PARALLEL_THRESHOLD):
+    """
+    Decide how many processes to render QR codes with. An explicit `workers`
+    value wins; otherwise use every core for decks of at least `threshold` cards.
+    """
+    if workers is not None:
+        return max(1, int(workers))
+    if card_count < threshold:
+        return 1
+    return os.cpu_count() or 1
+
+def generate_qr_data_uris(urls, qr_cache=None, qr_options=CARD_QR_OPTIONS, workers=1, executor=None):
+    """
+    Return QR data URIs for `urls`, in the same order.
+
+    Cached codes are served directly; the rest are rendered serially or, with
+    workers > 1, fanned out over a process pool, then added to the cache.
+    Pass a long-lived `executor` to reuse one pool across many calls.
+    """
+    data_uris = [None] * len(urls)
+    pending = []  # (index, url, cache key) of codes that still need rendering
+    for i, url in enumerate(urls):
+        key = qr_cache.make_key(url, qr_options) if qr_cache is not None else None
+        cached = qr_cache.get(key) if qr_cache is not None else None
+        if cached is not None:
+            data_uris[i] = cached
+        else:
+            pending.append((i, url, key))
+
+    jobs = [(url, qr_options) for _, url, _ in pending]
+    # executor.map keeps results in submission (card) order.
+    chunksize = max(1, len(jobs) // (workers * 4))
+    if executor is not None and len(jobs) > 1:
+        rendered = list(executor.map(_render_qr_worker, jobs, chunksize=chunksize))
+    elif workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            rendered = list(pool.map(_render_qr_worker, jobs, chunksize=chunksize))
+    else:
+        rendered = [_render_qr_worker(job) for job in jobs]
+
+    for (i, _, key), data_uri in zip(pending, rendered):
+        data_uris[i] = data_uri
+        if qr_cache is not None:
+            qr_cache.put(key, data_uri)
+    return data_uris
+
 def generate_qr_data_uri(url):
     """
     Legacy function that generates a standard QR code as a data URI.
@@ -132,98 +389,267 @@ def generate_qr_data_uri(url):
     """
     return generate_custom_qr_data_uri(url)
 
-def generate_html_cards(app_state, tracks_csv, output_dir):
+CARDS_PER_PAGE = 12  # 3x4 arrangement
+CSV_COLUMNS = ["Serial Number", "Artist", "Song Name", "Year", "Spotify URL"]
+
+def count_csv_rows(tracks_csv):
+    """Count the data rows of a tracks CSV without building row dicts."""
+    with open(tracks_csv, "r", encoding="utf-8", newline="") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+def make_card(serial_number, artist, song_name, year, url):
+    """The dict the card templates render for one track."""
+    return {
+        "serial_number": serial_number,
+        "artist": artist,
+        "song_name": song_name,
+        "year": year,
+        "url": url,
+        "gradient": generate_random_gradient(),
+    }
+
+def iter_csv_records(tracks_csv):
+    """Lazily yield (serial_number, artist, song_name, year, url) tuples from a tracks CSV."""
+    with open(tracks_csv, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [header.index(name) for name in CSV_COLUMNS]
+        for row in reader:
+            yield tuple(row[column] for column in columns)
+
+def iter_csv_tracks(tracks_csv):
+    """Lazily yield the rows of a tracks CSV, prepared for the card templates."""
+    for record in iter_csv_records(tracks_csv):
+        yield make_card(*record)
+
+def resolve_track_source(tracks_source):
+    """
+    A tracks CSV path is served from the binary deck written alongside it when
+    that is present and up to date; other sources (a catalog or binary deck)
+    are used as they are.
+    """
+    if isinstance(tracks_source, (str, os.PathLike)):
+        return open_deck_for_csv(tracks_source) or tracks_source
+    return tracks_source
+
+def count_source_tracks(tracks_source):
+    """Number of tracks in a tracks CSV path, a binary deck or a catalog deck."""
+    if isinstance(tracks_source, (str, os.PathLike)):
+        return count_csv_rows(tracks_source)
+    return tracks_source.count()
+
+def iter_source_tracks(tracks_source):
+    """Lazily yield cards from a tracks CSV path, a binary deck or a catalog deck."""
+    if isinstance(tracks_source, (str, os.PathLike)):
+        return iter_csv_tracks(tracks_source)
+    return (make_card(*record) for record in tracks_source.iter_records())
+
+def iter_pages(tracks, cards_per_page=CARDS_PER_PAGE):
+    """Yield (page_number, page_tracks) pairs from a lazy track iterable."""
+    return enumerate(chunk_iterable(tracks, cards_per_page), start=1)
+
+def page_file_names(page_number):
+    """Front and back file names of a page."""
+    page_str = str(page_number).zfill(2)  # ensures 01, 02, 03...
+    return f"page{page_str}_front.html", f"page{page_str}_back.html"
+
+def iter_stale_pages(pages, manifest, output_dir):
     """
-    Read tracks from CSV, chunk them into pages of 12 (3x4), and create multiple
-    front/back HTML files.
+    Filter (page_number, page_tracks) pairs down to the pages whose inputs
+    changed since the run recorded in `manifest` (or whose files are missing).
     """
+    for page_number, page_tracks in pages:
+        sides_present = {
+            side for side, name in zip(("front", "back"), page_file_names(page_number))
+            if os.path.exists(os.path.join(output_dir, name))
+        }
+        if manifest.check_page(page_number, page_tracks, sides_present):
+            yield page_number, page_tracks
+
+def iter_rendered_pages(pages, qr_cache, qr_options, workers=1, executor=None):
+    """
+    Attach QR codes to (page_number, page_tracks) pairs and yield them.
+
+    Pages are pulled lazily and QR codes are produced for one page at a time,
+    or `workers` pages at a time when a process pool is used so every worker
+    has something to do. Memory stays bounded by that batch, not the deck size.
+    """
+    qr_key = "qr_svg" if qr_options.get("qr_format") == "svg" else "qr_data_uri"
+    for batch in chunk_iterable(pages, max(1, workers)):
+        rows = [row for _, page_tracks in batch for row in page_tracks]
+        urls = [row["url"] for row in rows]
+        qr_codes = generate_qr_data_uris(urls, qr_cache, qr_options, workers=workers, executor=executor)
+        for row, qr_code in zip(rows, qr_codes):
+            row[qr_key] = qr_code
+        yield from batch
+
+def remove_stale_page_files(output_dir, page_numbers, page_count):
+    """Delete page files left over from an earlier, longer version of the deck."""
+    for page_number in page_numbers:
+        if page_number > page_count:
+            for name in page_file_names(page_number):
+                path = os.path.join(output_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+def generate_html_cards(
+        app_state,
+        tracks_source,
+        output_dir,
+        asset_mode=DEFAULT_ASSET_MODE,
+        background_dpi=BACKGROUND_DPI,
+        background_format=BACKGROUND_FORMAT,
+        use_qr_cache=True,
+        qr_workers=QR_WORKERS,
+        qr_format=QR_FORMAT,
+        layout=DEFAULT_OUTPUT_LAYOUT,
+        incremental=False):
+    """
+    Read tracks from a CSV path or a catalog deck (track_catalog.CatalogDeck),
+    chunk them into pages of 12 (3x4), and create multiple front/back HTML
+    files. Rows are streamed: each page is rendered and written as soon as its
+    QR codes are ready, so memory does not grow with deck size.
+
+    asset_mode selects between linking shared assets written once into
+    `output_dir` ("linked") and self-contained pages ("embedded").
+    The background is resampled to print size at `background_dpi` first;
+    pass None to use the original image. QR codes are served from the
+    persistent QR cache unless use_qr_cache is False; missing ones are rendered
+    with `qr_workers` processes (None picks a count from the deck size).
+    qr_format="svg" puts inline vector QR codes on the backs instead of PNGs.
+    layout="deck" writes one deck.html with front/back pages interleaved
+    instead of separate pageNN_front/back.html files.
+    incremental=True (pages layout) keeps a manifest.json in `output_dir` and
+    only re-renders the page sides whose rows, templates, embedded assets or
+    options changed.
+    """
+    if layout not in (OUTPUT_LAYOUT_PAGES, OUTPUT_LAYOUT_DECK):
+        raise ValueError(f"Unknown output layout: {layout}")
     front_template_path = os.path.join("templates", "cards_front_template.html")
     back_template_path = os.path.join("templates", "cards_back_template.html")
-    css_path = os.path.join("templates", "cards.css")
-    
-     # 1) Embed the CSS with background image as before
-    embedded_css = embed_css_with_background(css_path, BACKGROUND_IMAGE_PATH)
-    
-     # 2) Read the tracks CSV and build up a track list
-    all_tracks = []
-    with open(tracks_csv, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            qr_data_uri = generate_custom_qr_data_uri(
-                row["Spotify URL"],
-                box_size=4,
-                border=2,
-                fill_color="black",
-                back_color=(255, 255, 255)  # White background
-            )
-            row["qr_data_uri"] = qr_data_uri
-            row["gradient"] = generate_random_gradient()
-            row["serial_number"] = row["Serial Number"]
-            row["artist"] = row["Artist"]
-            row["song_name"] = row["Song Name"]
-            row["year"] = row["Year"]
-            all_tracks.append(row)
-    
-    # 3) Load the Jinja2 templates *once*, for front and back
-    with open(front_template_path, "r", encoding="utf-8") as f:
-        front_template_str = f.read()
-    front_template = Template(front_template_str)
-    with open(back_template_path, "r", encoding="utf-8") as f:
-        back_template_str = f.read()
-    back_template = Template(back_template_str)
-    
-     # 4) Decide how many cards per page
-    CARDS_PER_PAGE = 12  # 3x4 arrangement
-
-     # 5) Chunk the track list
-    pages = list(chunk_list(all_tracks, CARDS_PER_PAGE))
-
-    # 6)Mirror the order of items within each row
-    def mirror_columns_per_row(items, columns=3):
-        """Mirror left↔right order within each visual row, keeping row order."""
-        mirrored = []
-        for row in chunk_list(items, columns):
-            mirrored.extend(list(reversed(row)))
-        return mirrored
-
-    # 7) For each chunk -> generate a front HTML + back HTML
-    page_count = len(pages)
+    deck_template_path = os.path.join("templates", "cards_deck_template.html")
+
+    # 1) Count the rows up front (cheap, no row dicts) so the page total and
+    #    worker count are known before streaming starts
+    tracks_source = resolve_track_source(tracks_source)
+    track_count = count_source_tracks(tracks_source)
+    page_count = math.ceil(track_count / CARDS_PER_PAGE)
     if page_count == 0:
-        log_error(app_state, "No tracks found in CSV, nothing to generate.")
+        log_error(app_state, "No tracks found, nothing to generate.")
         return "No tracks to generate."
-    
-    # Prepare output
-    for i, page_tracks in enumerate(pages, start=1):
-        # Render front HTML for this chunk
-        front_html = front_template.render(
-            tracks=page_tracks,
-            css_embedded=embedded_css,
-            page_number=i,
-            total_pages=page_count
+
+     # 2) Link or embed the CSS and the (print-sized) background image
+    background_path = BACKGROUND_IMAGE_PATH
+    if background_dpi is not None:
+        background_path = prepare_background_image(
+            app_state, BACKGROUND_IMAGE_PATH, dpi=background_dpi, image_format=background_format
         )
+    front_styles, back_styles = build_page_styles(output_dir, background_path, asset_mode)
 
-        # Mirror columns for the back (flip on long edge)
-        back_tracks = mirror_columns_per_row(page_tracks, columns=3)
+    # 3) Load the Jinja2 templates *once*, for front and back
+    front_template = load_template(front_template_path)
+    back_template = load_template(back_template_path)
 
-        # Render back HTML for this chunk
-        back_html = back_template.render(
-            tracks=back_tracks,
-            css_embedded=embedded_css,
-            page_number=i,
-            total_pages=page_count
-        )
-        # Save each to a separate file
-        page_str = str(i).zfill(2)  # ensures 01, 02, 03...
-        front_file_name = f"page{page_str}_front.html"
-        back_file_name = f"page{page_str}_back.html"
-        front_path = os.path.join(output_dir, front_file_name)
-        back_path = os.path.join(output_dir, back_file_name)
-        with open(front_path, "w", encoding="utf-8") as f:
-            f.write(front_html)
-        with open(back_path, "w", encoding="utf-8") as f:
-            f.write(back_html)
-        log_info(app_state, f"Generated page {i} front/back: {front_file_name}, {back_file_name}")
-    
-    summary = f"{len(all_tracks)} tracks across {page_count} pages, saved in {output_dir}"
+    qr_options = dict(CARD_QR_OPTIONS, qr_format=qr_format)
+
+    # 4) In incremental mode, compare against the manifest of the previous run
+    manifest = None
+    if incremental and layout != OUTPUT_LAYOUT_PAGES:
+        log_info(app_state, "Incremental generation only applies to the pages layout; rebuilding everything.")
+    elif incremental:
+        # Linked pages only reference cards.css, cards_back.css and the background
+        # (rewritten above every run), so asset contents only matter when embedded.
+        page_options = {"asset_mode": asset_mode, "cards_per_page": CARDS_PER_PAGE, "total_pages": page_count}
+        front_assets, back_assets = {}, {}
+        if asset_mode == ASSET_MODE_EMBEDDED:
+            front_assets = {"css": hash_file(CARD_CSS_PATH)}
+            back_assets = dict(
+                front_assets, back_css=hash_file(CARD_BACK_CSS_PATH), background=hash_file(background_path)
+            )
+        manifest = DeckManifest(output_dir, {
+            "front": {
+                "template": hash_file(front_template_path),
+                "assets": front_assets,
+                "options": page_options,
+            },
+            "back": {
+                "template": hash_file(back_template_path),
+                "assets": back_assets,
+                "options": dict(page_options, qr_options=qr_options),
+            },
+        })
+
+    # 5) Stream the deck: read rows lazily, render QR codes a page (batch) at
+    #    a time and write every page as soon as it is ready
+    workers = resolve_qr_workers(track_count, qr_workers)
+    if workers > 1:
+        log_info(app_state, f"Rendering QR codes with {workers} worker processes")
+    qr_cache = QRCodeCache() if use_qr_cache else None
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        pages = iter_pages(iter_source_tracks(tracks_source))
+        if manifest is not None:
+            pages = iter_stale_pages(pages, manifest, output_dir)
+        pages = iter_rendered_pages(pages, qr_cache, qr_options, workers, executor)
+
+        if layout == OUTPUT_LAYOUT_DECK:
+            # One document; the back styles already include the shared CSS, so it appears once.
+            deck_path = os.path.join(output_dir, "deck.html")
+            write_deck_html(deck_path, load_template(deck_template_path), pages, back_styles, page_count)
+            log_info(app_state, f"Generated {page_count} front/back pages in deck.html")
+        else:
+            # Separate front/back files per page
+            for i, page_tracks in pages:
+                # Incremental runs only rewrite the sides whose inputs changed
+                sides = manifest.stale_sides(i) if manifest is not None else {"front", "back"}
+                front_file_name, back_file_name = page_file_names(i)
+                written = []
+                if "front" in sides:
+                    # Render front HTML for this chunk
+                    front_html = front_template.render(
+                        tracks=page_tracks,
+                        page_styles=front_styles,
+                        page_number=i,
+                        total_pages=page_count
+                    )
+                    front_path = os.path.join(output_dir, front_file_name)
+                    detach_output_file(front_path)
+                    with open(front_path, "w", encoding="utf-8") as f:
+                        f.write(front_html)
+                    written.append(front_file_name)
+                if "back" in sides:
+                    # Mirror columns for the back (flip on long edge)
+                    back_tracks = mirror_columns_per_row(page_tracks, columns=3)
+
+                    # Render back HTML for this chunk
+                    back_html = back_template.render(
+                        tracks=back_tracks,
+                        page_styles=back_styles,
+                        page_number=i,
+                        total_pages=page_count
+                    )
+                    back_path = os.path.join(output_dir, back_file_name)
+                    detach_output_file(back_path)
+                    with open(back_path, "w", encoding="utf-8") as f:
+                        f.write(back_html)
+                    written.append(back_file_name)
+                log_info(app_state, f"Generated page {i}: {', '.join(written)}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if qr_cache is not None:
+            qr_cache.close()
+
+    if manifest is not None:
+        remove_stale_page_files(output_dir, manifest.previous_page_numbers, page_count)
+        manifest.save()
+
+    summary = f"{track_count} tracks across {page_count} pages, saved in {output_dir}"
+    if manifest is not None:
+        summary += f" ({manifest.summary()})"
+    if qr_cache is not None:
+        summary += f" ({qr_cache.stats_summary()})"
     log_success(app_state, summary)
     return summary
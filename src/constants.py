@@ -2,4 +2,150 @@ import os
 
 BACKGROUND_IMAGE_FILENAME = "card_bg_09.png"
 BACKGROUND_IMAGE_PATH = os.path.join("assets", BACKGROUND_IMAGE_FILENAME)
-BACKGROUND_IMAGE_PLACEHOLDER = f"../assets/{BACKGROUND_IMAGE_FILENAME}"
\ No newline at end of file
+BACKGROUND_IMAGE_PLACEHOLDER = f"../assets/{BACKGROUND_IMAGE_FILENAME}"
+
+CARD_CSS_PATH = os.path.join("templates", "cards.css")
+CARD_BACK_CSS_PATH = os.path.join("templates", "cards_back.css")
+
+# How generated pages get their stylesheets and background image:
+#   "linked"   - cards.css, cards_back.css and the background are written once per
+#                output directory and every page references them relatively.
+#   "embedded" - every page is self-contained (CSS and background inlined), handy
+#                for emailing single pages around.
+ASSET_MODE_LINKED = "linked"
+ASSET_MODE_EMBEDDED = "embedded"
+DEFAULT_ASSET_MODE = ASSET_MODE_LINKED
+
+# Local caches for derived artifacts (safe to delete, rebuilt on demand).
+CACHE_DIR = os.path.join("data", "cache")
+BACKGROUND_CACHE_DIR = os.path.join(CACHE_DIR, "backgrounds")
+
+# Physical card size, keep in sync with .card in templates/cards.css.
+CARD_WIDTH_MM = 60
+CARD_HEIGHT_MM = 60
+
+# Backgrounds are resampled to the card size at this resolution before use.
+# Set BACKGROUND_DPI to None to use the original image untouched.
+BACKGROUND_DPI = 300
+BACKGROUND_FORMAT = "jpeg"  # "jpeg" or "webp"
+
+# Persistent QR code cache, evicted least-recently-used first above the size cap.
+QR_CACHE_PATH = os.path.join(CACHE_DIR, "qr_cache.sqlite3")
+QR_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Parallel QR rendering: None uses every CPU core for decks of at least
+# QR_PARALLEL_THRESHOLD cards and a single process below that.
+QR_WORKERS = None
+QR_PARALLEL_THRESHOLD = 60
+
+# QR code output on the card backs:
+#   "png"    - styled raster image, Base64-inlined as a data URI
+#   "bitmap" - exact-size 1-bit PNG data URI (fast path, no resampling)
+#   "svg"    - inline vector path, sharp at any print size and much smaller
+QR_FORMAT = "png"
+
+# Layout of the generated HTML:
+#   "pages" - pageNN_front.html / pageNN_back.html pairs
+#   "deck"  - a single deck.html with all pages interleaved front/back
+OUTPUT_LAYOUT_PAGES = "pages"
+OUTPUT_LAYOUT_DECK = "deck"
+DEFAULT_OUTPUT_LAYOUT = OUTPUT_LAYOUT_PAGES
+
+# Card output format: "html" pages or a single print-ready "pdf".
+OUTPUT_FORMAT_HTML = "html"
+OUTPUT_FORMAT_PDF = "pdf"
+DEFAULT_OUTPUT_FORMAT = OUTPUT_FORMAT_HTML
+
+# Optional TTF fonts for the PDF backend (None = built-in Helvetica, Latin-1 only).
+PDF_FONT_PATH = None
+PDF_BOLD_FONT_PATH = None
+
+# Incremental generation: write into a stable generated_cards/<playlist>/ folder
+# and only re-render pages whose inputs changed since the last run.
+INCREMENTAL_GENERATION = False
+
+# Spotify playlist import.
+SPOTIFY_PAGE_SIZE = 100  # Max items per playlist_items request
+PLAYLIST_FETCH_WORKERS = 4  # Concurrent page requests once the total is known
+
+# Shared Spotify rate limiting: adaptive token bucket plus retries on 429/5xx.
+SPOTIFY_MAX_REQUESTS_PER_SECOND = 10
+SPOTIFY_MIN_REQUESTS_PER_SECOND = 1
+SPOTIFY_MAX_RETRIES = 5
+SPOTIFY_BACKOFF_BASE_SECONDS = 0.5
+SPOTIFY_BACKOFF_MAX_SECONDS = 30
+
+# Market (ISO 3166-1 alpha-2) used for track relinking and the `is_playable`
+# check; tracks not playable there are skipped. None disables the check.
+SPOTIFY_MARKET = "US"
+
+# Only the playlist item fields the importer actually uses.
+PLAYLIST_ITEM_FIELDS = (
+    "items(track(name,is_playable,artists(name),album(release_date),external_urls(spotify),external_ids(isrc))),"
+    "total,next"
+)
+
+# Parsed playlist tracks cached per playlist ID, reused while the Spotify
+# snapshot_id is unchanged.
+PLAYLIST_CACHE_DIR = os.path.join(CACHE_DIR, "playlists")
+
+# Metadata fetched when a new playlist is set is reused by an import started
+# within this many seconds instead of being requested again.
+PLAYLIST_METADATA_MAX_AGE_SECONDS = 300
+
+# Spotify access token cache (owner-only file), refreshed shortly before expiry.
+# It holds one token, so runs against the local stand-in use their own file
+# (init_spotify_client's token_cache_path or the SPOTIFY_TOKEN_CACHE_PATH variable).
+SPOTIFY_TOKEN_CACHE_PATH = os.environ.get(
+    "SPOTIFY_TOKEN_CACHE_PATH", os.path.join(CACHE_DIR, "spotify_token.json")
+)
+SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS = 120
+
+# Shared HTTP session for auth and API calls: kept-alive connections per host
+# (at least PLAYLIST_FETCH_WORKERS). The session sets no timeout; every call site
+# passes HTTP_TIMEOUT_SECONDS with its requests.
+HTTP_POOL_SIZE = 8
+HTTP_TIMEOUT_SECONDS = 10
+
+# Batch import: playlists imported at once. Each import also fetches pages with
+# PLAYLIST_FETCH_WORKERS threads, so keep the product near HTTP_POOL_SIZE.
+BATCH_IMPORT_WORKERS = 2
+
+# Spotify endpoints. Override with the SPOTIFY_API_URL / SPOTIFY_AUTH_URL
+# environment variables to run against a local stand-in (src/spotify_standin.py).
+SPOTIFY_API_URL = os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com/v1/")
+SPOTIFY_AUTH_URL = os.environ.get("SPOTIFY_AUTH_URL", "https://accounts.spotify.com/api/token")
+
+# Optional import stage: replace album years (often a remaster or compilation)
+# with each recording's original release year from MusicBrainz, looked up by
+# ISRC in batches and cached locally. MusicBrainz asks for 1 request/second
+# and a descriptive User-Agent.
+ORIGINAL_YEAR_LOOKUP = False
+YEAR_CACHE_PATH = os.path.join(CACHE_DIR, "original_years.sqlite3")
+YEAR_CACHE_MISS_TTL_DAYS = 30
+MUSICBRAINZ_API_URL = "https://musicbrainz.org/ws/2/"
+MUSICBRAINZ_BATCH_SIZE = 25
+MUSICBRAINZ_REQUESTS_PER_SECOND = 1
+MUSICBRAINZ_USER_AGENT = "Hitsteripy/1.0 (Spotify playlist card generator)"  # add a contact address
+
+# Local catalog of every imported track, playlist and import run (CSV files are
+# still written as an export). Tracks are written in batches of this size.
+CATALOG_PATH = os.path.join("data", "catalog.sqlite3")
+CATALOG_BATCH_SIZE = 500
+
+# Import CSVs live in imported_tracks/<timestamp>_<count>/; the index lists them
+# for the card generation picker without rescanning the whole tree.
+IMPORTED_TRACKS_DIR = "imported_tracks"
+IMPORT_INDEX_PATH = os.path.join("data", "import_index.json")
+
+# Playlist and track count histories: most recent picks first, written to disk
+# this many seconds after the last change (and at exit).
+HISTORY_MAX_ENTRIES = 20
+HISTORY_FLUSH_DELAY_SECONDS = 2.0
+
+# Generated card runs: generated_cards/<timestamp>_<playlist>/ directories made
+# of hardlinks into a content-addressed store, so identical pages and assets are
+# stored once. Cleaning up keeps this many runs per source deck.
+GENERATED_CARDS_DIR = "generated_cards"
+OUTPUT_STORE_DIR = os.path.join(GENERATED_CARDS_DIR, ".store")
+OUTPUT_KEEP_RUNS = 3
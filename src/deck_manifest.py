@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 3
+
+# The track fields that make up a card; derived template fields are not hashed.
+CARD_FIELDS = ["serial_number", "artist", "song_name", "year", "url"]
+
+def hash_json(value):
+    """Stable SHA-256 of a JSON-serializable value."""
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def hash_track_row(row):
+    """Hash the track fields of one card."""
+    return hash_json([row.get(field) for field in CARD_FIELDS])
+
+class DeckManifest:
+    """
+    Per-page record of what a generated deck was built from, stored as
+    manifest.json next to the pages.
+
+    `build_info` maps each page side ("front", "back") to everything that side
+    depends on besides its rows (template, embedded asset hashes, rendering
+    options, page total). A side from the previous run can be reused when its
+    build info is unchanged and the page's row hashes are identical, so e.g. a
+    new QR style only rebuilds the backs.
+    """
+
+    def __init__(self, output_dir, build_info):
+        self.path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        self.build_info = build_info
+        self.build_hashes = {side: hash_json(info) for side, info in build_info.items()}
+        self.pages = {}
+        self.stale = {}
+        self.reused = 0
+        self.rebuilt = 0
+        self.previous_pages = {}
+
+        previous = self._load()
+        if previous.get("version") == MANIFEST_VERSION:
+            self.previous_pages = previous.get("pages", {})
+        self.previous_page_numbers = [int(number) for number in previous.get("pages", {})]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # unreadable manifest: rebuild everything
+
+    def check_page(self, page_number, page_tracks, sides_present=None):
+        """
+        Record `page_tracks` as page `page_number` and return the set of sides
+        that must be rendered again: those whose inputs changed since the
+        previous run, or that are not in `sides_present` (files still on disk;
+        None means all of them).
+        """
+        row_hashes = [hash_track_row(row) for row in page_tracks]
+        previous = self.previous_pages.get(str(page_number), {})
+        record = {"rows": row_hashes}
+        stale = set()
+        for side, build_hash in self.build_hashes.items():
+            record[side] = hash_json([build_hash, row_hashes])
+            present = sides_present is None or side in sides_present
+            if not present or previous.get(side) != record[side]:
+                stale.add(side)
+        self.pages[str(page_number)] = record
+        self.stale[page_number] = stale
+        self.reused += len(self.build_hashes) - len(stale)
+        self.rebuilt += len(stale)
+        return stale
+
+    def stale_sides(self, page_number):
+        """Sides of `page_number` that check_page() found out of date."""
+        return self.stale.get(page_number, set(self.build_hashes))
+
+    def save(self):
+        """Write the manifest atomically."""
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "build_hashes": self.build_hashes,
+            "build": self.build_info,
+            "pages": self.pages,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(temp_path, self.path)
+
+    def summary(self):
+        return f"{self.reused} page sides reused, {self.rebuilt} rebuilt"
@@ -0,0 +1,94 @@
+import os
+import json
+import atexit
+import threading
+from .constants import HISTORY_MAX_ENTRIES, HISTORY_FLUSH_DELAY_SECONDS
+
+class HistoryStore:
+    """
+    Most-recently-used list persisted as a JSON array (playlist or track count
+    history). The file is read once; entries are normalized with `normalize`
+    (None drops an entry) and deduplicated by `key`, newest first, keeping at
+    most `max_entries`.
+
+    Changes are written `flush_delay` seconds after the last one, from a timer
+    thread, so menu actions never wait on disk; pending changes are also written
+    by flush(), which runs at interpreter exit. Writes go to a temp file that
+    replaces the history atomically, so a crash never leaves half a file.
+    """
+
+    def __init__(self, path, normalize=lambda entry: entry, key=lambda entry: entry,
+                 max_entries=HISTORY_MAX_ENTRIES, flush_delay=HISTORY_FLUSH_DELAY_SECONDS):
+        self.path = path
+        self.normalize = normalize
+        self.key = key
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self.lock = threading.Lock()
+        self.timer = None
+        stored = self._read()
+        self._entries = self._dedupe(stored)
+        self.dirty = self._entries != stored  # e.g. duplicates in an older file, rewritten at exit
+        atexit.register(self.flush)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return data if isinstance(data, list) else []
+
+    def _dedupe(self, entries):
+        """Normalized entries, first occurrence of each key wins, capped at max_entries."""
+        seen = set()
+        result = []
+        for entry in entries:
+            entry = self.normalize(entry)
+            if entry is None or self.key(entry) in seen:
+                continue
+            seen.add(self.key(entry))
+            result.append(entry)
+        return result[:self.max_entries]
+
+    @property
+    def entries(self):
+        """Snapshot of the history, most recent first."""
+        with self.lock:
+            return list(self._entries)
+
+    def get(self, key):
+        """The entry stored under `key`, or None."""
+        with self.lock:
+            return next((entry for entry in self._entries if self.key(entry) == key), None)
+
+    def add(self, entry):
+        """Move `entry` to the front (replacing any entry with the same key) and schedule a write."""
+        with self.lock:
+            entries = self._dedupe([entry] + self._entries)
+            if entries == self._entries:
+                return
+            self._entries = entries
+            self.dirty = True
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.flush_delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.dirty = False
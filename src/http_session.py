@@ -0,0 +1,31 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from .constants import HTTP_POOL_SIZE
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_http_session(pool_size=HTTP_POOL_SIZE):
+    """
+    Build a requests.Session with a connection pool of `pool_size` kept-alive
+    connections per host. Retries are left to rate_limiter, so the adapter
+    never retries on its own.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+def get_http_session():
+    """
+    Return the process-wide session shared by the token endpoint and the
+    Spotify client, so both reuse warm TLS connections. Created on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_http_session()
+        return _session
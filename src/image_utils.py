@@ -0,0 +1,102 @@
+import os
+import hashlib
+from PIL import Image, ImageOps
+from .logger import log_info
+from .constants import (
+    BACKGROUND_CACHE_DIR,
+    BACKGROUND_DPI,
+    BACKGROUND_FORMAT,
+    CARD_WIDTH_MM,
+    CARD_HEIGHT_MM,
+)
+
+MM_PER_INCH = 25.4
+
+# Encoder settings per output format: (file extension, Pillow save options).
+IMAGE_ENCODERS = {
+    "jpeg": ("jpg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("webp", {"quality": 80, "method": 6}),
+}
+
+def mm_to_pixels(mm, dpi):
+    """Convert a physical length in millimetres to pixels at `dpi`."""
+    return max(1, round(mm / MM_PER_INCH * dpi))
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cover_resize(img, target_size):
+    """
+    Scale and center-crop `img` so it fills `target_size` exactly, the same way
+    CSS `background-size: cover` does. Never upscales: if the source is too small
+    it is only cropped to the target aspect ratio.
+    """
+    target_w, target_h = target_size
+    scale = max(target_w / img.width, target_h / img.height)
+    if scale > 1:
+        crop_w = min(img.width, round(img.height * target_w / target_h))
+        crop_h = min(img.height, round(img.width * target_h / target_w))
+        target_w, target_h = crop_w, crop_h
+    return ImageOps.fit(img, (target_w, target_h), method=Image.LANCZOS, centering=(0.5, 0.5))
+
+def flatten_to_rgb(img, background=(255, 255, 255)):
+    """Drop transparency by compositing onto a solid background."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        flattened = Image.new("RGB", img.size, background)
+        flattened.paste(img, mask=img.getchannel("A"))
+        return flattened
+    return img.convert("RGB")
+
+def prepare_background_image(
+        app_state,
+        source_path,
+        dpi=BACKGROUND_DPI,
+        image_format=BACKGROUND_FORMAT,
+        card_size_mm=(CARD_WIDTH_MM, CARD_HEIGHT_MM),
+        cache_dir=BACKGROUND_CACHE_DIR):
+    """
+    Return the path of a print-sized copy of the background at `source_path`.
+
+    The image is cover-cropped to the card aspect ratio, resampled to the card's
+    physical size at `dpi` and re-encoded as `image_format` ("jpeg" or "webp").
+    Results are cached in `cache_dir` keyed by source hash, DPI and format, so
+    each theme is only processed once.
+    """
+    image_format = image_format.lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+    if image_format not in IMAGE_ENCODERS:
+        raise ValueError(f"Unsupported background format: {image_format}")
+    extension, save_options = IMAGE_ENCODERS[image_format]
+
+    target_size = tuple(mm_to_pixels(mm, dpi) for mm in card_size_mm)
+    source_hash = hash_file(source_path)[:16]
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    cached_name = f"{stem}_{source_hash}_{dpi}dpi_{target_size[0]}x{target_size[1]}.{extension}"
+    cached_path = os.path.join(cache_dir, cached_name)
+
+    if os.path.exists(cached_path):
+        log_info(app_state, f"Using cached background: {cached_path}")
+        return cached_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(source_path) as img:
+        processed = cover_resize(flatten_to_rgb(img), target_size)
+
+    # Write to a temp file first so an interrupted run never leaves a partial cache entry.
+    temp_path = f"{cached_path}.{os.getpid()}.tmp"
+    processed.save(temp_path, format=image_format.upper(), dpi=(dpi, dpi), **save_options)
+    os.replace(temp_path, cached_path)
+
+    log_info(
+        app_state,
+        f"Prepared background {os.path.basename(source_path)} at {dpi} DPI "
+        f"({processed.width}x{processed.height}, {os.path.getsize(cached_path) // 1024} KB)"
+    )
+    return cached_path
@@ -0,0 +1,143 @@
+import os
+import json
+import threading
+from .constants import IMPORTED_TRACKS_DIR, IMPORT_INDEX_PATH
+from .binary_deck import open_deck_for_csv
+
+INDEX_VERSION = 1
+_index_lock = threading.Lock()  # imports can finish concurrently (batch import)
+
+# data/import_index.json remembers every CSV under imported_tracks/ (playlist
+# name, row count, creation time, size), grouped by import directory together
+# with that directory's mtime. Adding, removing or renaming a file changes its
+# directory's mtime, so only directories whose mtime moved are rescanned.
+
+def _load():
+    try:
+        with open(IMPORT_INDEX_PATH, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except (OSError, ValueError):
+        pass
+    return {"version": INDEX_VERSION, "root_mtime": None, "dirs": {}}
+
+def _save(index):
+    os.makedirs(os.path.dirname(IMPORT_INDEX_PATH) or ".", exist_ok=True)
+    temp_path = f"{IMPORT_INDEX_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, IMPORT_INDEX_PATH)
+
+def count_import_rows(csv_path):
+    """Row count from the binary deck header when available, otherwise by reading the CSV."""
+    deck = open_deck_for_csv(csv_path)
+    if deck is not None:
+        return deck.count()
+    from .card_utils import count_csv_rows
+    return count_csv_rows(csv_path)
+
+def _scan_dir(subdir_path, known_files):
+    """Index the CSVs of one import directory, reusing entries whose size and mtime are unchanged."""
+    files = {}
+    for file_name in os.listdir(subdir_path):
+        if not file_name.lower().endswith(".csv"):
+            continue
+        csv_path = os.path.join(subdir_path, file_name)
+        stat = os.stat(csv_path)
+        known = known_files.get(file_name)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime:
+            files[file_name] = known
+            continue
+        files[file_name] = {
+            "playlist_name": (known or {}).get("playlist_name") or file_name[:-len("_tracks.csv")] or file_name,
+            "rows": count_import_rows(csv_path),
+            "created": (known or {}).get("created") or stat.st_mtime,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+    return files
+
+def _refresh(index, base_dir):
+    """Bring `index` up to date with `base_dir`; returns True if anything changed."""
+    changed = False
+    root_mtime = os.stat(base_dir).st_mtime
+    dirs = index["dirs"]
+    if root_mtime != index["root_mtime"]:
+        present = {name for name in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, name))}
+        for name in set(dirs) - present:
+            del dirs[name]
+        for name in present - set(dirs):
+            dirs[name] = {"mtime": None, "files": {}}
+        index["root_mtime"] = root_mtime
+        changed = True
+    for name, entry in list(dirs.items()):
+        subdir_path = os.path.join(base_dir, name)
+        try:
+            mtime = os.stat(subdir_path).st_mtime
+        except OSError:
+            del dirs[name]
+            changed = True
+            continue
+        if mtime != entry["mtime"]:
+            entry["files"] = _scan_dir(subdir_path, entry["files"])
+            entry["mtime"] = mtime
+            changed = True
+    return changed
+
+def record_import(csv_path, playlist_name, row_count, playlist_id=None):
+    """Add (or update) a freshly written import CSV in the index."""
+    base_dir = os.path.dirname(os.path.dirname(csv_path)) or "."
+    subdir_name = os.path.basename(os.path.dirname(csv_path))
+    with _index_lock:
+        index = _load()
+        stat = os.stat(csv_path)
+        entry = index["dirs"].setdefault(subdir_name, {"mtime": None, "files": {}})
+        entry["files"][os.path.basename(csv_path)] = {
+            "playlist_name": playlist_name,
+            "playlist_id": playlist_id,
+            "rows": row_count,
+            "created": stat.st_mtime,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        # The rescan of this directory reuses the entry above instead of recounting
+        _refresh(index, base_dir)
+        _save(index)
+
+def get_import(csv_path):
+    """The index entry of `csv_path` (see list_imports), or None if it isn't indexed."""
+    subdir_path, file_name = os.path.split(csv_path)
+    with _index_lock:
+        index = _load()
+    info = index["dirs"].get(os.path.basename(subdir_path), {}).get("files", {}).get(file_name)
+    return dict(info, path=csv_path) if info else None
+
+def deck_identity(csv_path):
+    """
+    (key, name) of the deck in `csv_path`: the Spotify playlist ID and name
+    recorded at import, or for CSVs added by hand the CSV path and file name.
+    Re-imports of one playlist share a key, different CSVs never do.
+    """
+    entry = get_import(csv_path) or {}
+    name = entry.get("playlist_name") or os.path.splitext(os.path.basename(csv_path))[0]
+    return entry.get("playlist_id") or os.path.normpath(csv_path), name
+
+def list_imports(base_dir=IMPORTED_TRACKS_DIR):
+    """
+    All imported CSVs, newest first, as dicts with path, playlist_name, rows,
+    created (Unix time) and size. Only directories that changed are rescanned.
+    """
+    if not os.path.isdir(base_dir):
+        return []
+    with _index_lock:
+        index = _load()
+        if _refresh(index, base_dir):
+            _save(index)
+    imports = [
+        dict(info, path=os.path.join(base_dir, subdir_name, file_name))
+        for subdir_name, entry in index["dirs"].items()
+        for file_name, info in entry["files"].items()
+    ]
+    imports.sort(key=lambda item: item["created"], reverse=True)
+    return imports
@@ -1,11 +1,22 @@
 import os
-import json
+import time
 from rich.console import Console
 from src.logger import log_info, log_error, log_success
-from src.spotify_utils import init_spotify_client, test_spotify_connection
+from src.spotify_utils import init_spotify_client, test_spotify_connection, extract_id_from_url, fetch_playlist_metadata
 from src.track_importer import import_tracks
+from src.batch_importer import import_playlists, report_batch_import
 from src.card_utils import generate_html_cards
-from src.menu import create_main_menu, select_playlist, select_track_count
+from src.pdf_utils import generate_pdf_cards
+from src.output_store import store_run_outputs, write_run_marker, collect_garbage, format_gc_summary
+from src.constants import (
+    DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMAT_PDF, INCREMENTAL_GENERATION, GENERATED_CARDS_DIR, OUTPUT_KEEP_RUNS,
+    PLAYLIST_METADATA_MAX_AGE_SECONDS
+)
+from src.menu import create_main_menu, select_playlist, select_track_count, select_batch_playlists
+from src.history_store import HistoryStore
+from src.import_index import deck_identity
+from src.track_catalog import TrackCatalog, CatalogDeck
+from src.deck_manifest import hash_json
 
 console = Console()
 
@@ -13,28 +24,33 @@ DATA_DIR = "data"
 PLAYLIST_HISTORY_FILE = os.path.join(DATA_DIR, "playlist_history.json")
 TRACK_COUNT_HISTORY_FILE = os.path.join(DATA_DIR, "track_count_history.json")
 
-def load_history(file_path):
-    """Load history data (JSON) from file or return empty list."""
-    if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+def normalize_playlist_entry(entry):
+    """History dict {"name", "url"} with a stripped URL, or None if it has no URL."""
+    if not isinstance(entry, dict) or not str(entry.get("url") or "").strip():
+        return None
+    return {"name": entry.get("name") or "Unknown Playlist", "url": str(entry["url"]).strip()}
 
-def save_history(file_path, data):
-    """Save JSON data to file with indentation."""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+def normalize_track_count(count):
+    """Track count as a string ("100" and 100 are the same pick), "all", or None if invalid."""
+    count = str(count).strip().lower()
+    if count == "all":
+        return count
+    return str(int(count)) if count.isdigit() and int(count) > 0 else None
+
+def playlist_key(entry):
+    # The same playlist shared twice differs only in its ?si= parameter
+    return extract_id_from_url(entry["url"])
+
+playlist_history = HistoryStore(PLAYLIST_HISTORY_FILE, normalize=normalize_playlist_entry, key=playlist_key)
+track_count_history = HistoryStore(TRACK_COUNT_HISTORY_FILE, normalize=normalize_track_count)
 
 def set_playlist_url(app_state):
     """
     Opens a sub-menu to pick a playlist or enter a new URL.
     Stores playlist history as a list of dicts: { "name": "Playlist Name", "url": "..." }
     """
-    playlist_history = load_history(PLAYLIST_HISTORY_FILE)
-
     # The sub-menu returns either None (user cancelled) or a dict {"name": ..., "url": ...}
-    chosen_dict = select_playlist(app_state, playlist_history)
+    chosen_dict = select_playlist(app_state, playlist_history.entries)
     if chosen_dict is None:
         log_info(app_state, "Cancelled playlist selection.")
         return
@@ -45,23 +61,27 @@ def set_playlist_url(app_state):
     app_state["playlist_url"] = chosen_url
     app_state["playlist_name"] = chosen_dict["name"]
 
-    # If not already in history, fetch name from Spotify and append
-    if not any(p["url"] == chosen_url for p in playlist_history):
-        from src.spotify_utils import extract_id_from_url, fetch_playlist_name
+    # If not already in history, fetch name from Spotify (kept for the next import)
+    pid = extract_id_from_url(chosen_url)
+    known_entry = playlist_history.get(pid)
+    app_state["playlist_metadata"] = None
+    if known_entry is None:
         sp = app_state["spotify_client"]
-        pid = extract_id_from_url(chosen_url)
         try:
-            real_name = fetch_playlist_name(app_state, sp, pid)
+            metadata = fetch_playlist_metadata(app_state, sp, pid)
+            real_name = metadata["name"]
+            app_state["playlist_metadata"] = dict(metadata, playlist_id=pid, fetched_at=time.time())
         except Exception as e:
             log_error(app_state, f"Failed to fetch playlist name: {e}")
             real_name = "Unknown Playlist"
 
-        new_entry = {"name": real_name, "url": chosen_url}
-        playlist_history.insert(0, new_entry)  # Insert at front
-        save_history(PLAYLIST_HISTORY_FILE, playlist_history)
-
         # Update app_state with the real name
         app_state["playlist_name"] = real_name
+    else:
+        app_state["playlist_name"] = known_entry["name"]
+
+    # Most recent pick goes to the front of the history
+    playlist_history.add({"name": app_state["playlist_name"], "url": chosen_url})
 
     # Log both name and URL
     log_success(app_state, f"Playlist set: {app_state['playlist_name']} ({chosen_url})")
@@ -70,11 +90,8 @@ def set_track_count(app_state):
     """
     Opens a sub-menu to select or specify the number of tracks to import.
     """
-    # Load track count history
-    track_count_history = load_history(TRACK_COUNT_HISTORY_FILE)
-
     # Get the selected track count or None if canceled
-    selected_count = select_track_count(app_state, track_count_history)
+    selected_count = select_track_count(app_state, track_count_history.entries)
     if selected_count is None:
         log_info(app_state, "Cancelled track count selection.")
         return
@@ -82,13 +99,20 @@ def set_track_count(app_state):
     # Update app_state with the selected track count
     app_state["track_count"] = selected_count
 
-    # Save the selected count to history if it's new
-    if selected_count not in track_count_history:
-        track_count_history.insert(0, selected_count)
-        save_history(TRACK_COUNT_HISTORY_FILE, track_count_history)
+    # Most recent pick goes to the front of the history
+    track_count_history.add(selected_count)
 
     log_success(app_state, f"Track count set to: {selected_count}")
 
+def recent_playlist_metadata(app_state, playlist_url):
+    """Metadata fetched by set_playlist_url for `playlist_url` if still fresh, else None."""
+    metadata = app_state.get("playlist_metadata")
+    if not metadata or metadata["playlist_id"] != extract_id_from_url(playlist_url):
+        return None
+    if time.time() - metadata["fetched_at"] > PLAYLIST_METADATA_MAX_AGE_SECONDS:
+        return None
+    return metadata
+
 def do_import_tracks(app_state):
     """
     Import tracks from the selected playlist and save them to a CSV file.
@@ -106,12 +130,34 @@ def do_import_tracks(app_state):
     track_count = app_state["track_count"]
 
     try:
-        csv_file, summary = import_tracks(app_state, sp, playlist_url, track_count)
+        csv_file, summary, _ = import_tracks(
+            app_state, sp, playlist_url, track_count, metadata=recent_playlist_metadata(app_state, playlist_url)
+        )
+        app_state["playlist_metadata"] = None  # used once; later imports check the snapshot again
         app_state["imported_tracks_file"] = csv_file
         log_success(app_state, summary)
     except Exception as e:
         log_error(app_state, f"Failed to import tracks: {e}")
 
+def do_batch_import(app_state):
+    """
+    Import several playlists (entered URLs or the whole playlist history)
+    concurrently, one CSV each, using the current track count.
+    """
+    if not app_state["track_count"]:
+        log_error(app_state, "No track count set. Please set a track count first.")
+        return
+
+    playlist_urls = select_batch_playlists(playlist_history.entries)
+    if not playlist_urls:
+        log_error(app_state, "No playlists to import.")
+        return
+
+    started = time.perf_counter()
+    results = import_playlists(app_state, app_state["spotify_client"], playlist_urls, app_state["track_count"])
+    report_batch_import(app_state, results, time.perf_counter() - started)
+    console.input("[bold green]Press Enter to return to the main menu.[/bold green]")
+
 import re
 from datetime import datetime
 
@@ -138,20 +184,82 @@ def do_generate_cards(app_state):
 
     # They picked a file. We'll use that for generation.
     app_state["imported_tracks_file"] = csv_path
+    deck_key, deck_name = deck_identity(csv_path)
+    generate_deck(app_state, csv_path, deck_key, deck_name)
 
+def do_generate_catalog_cards(app_state):
+    """
+    Generate cards from the track catalog: one earlier import run, or every
+    imported track within a year range (each track once, ordered by year).
+    """
+    from src.menu import select_catalog_deck
+
+    with TrackCatalog() as catalog:
+        catalog_runs = catalog.list_runs()
+    deck_options = select_catalog_deck(catalog_runs)
+    if deck_options is None:
+        log_info(app_state, "Cancelled catalog deck selection.")
+        return
+
+    deck = CatalogDeck(**deck_options)
+    if "run_id" in deck_options:
+        run = next(run for run in catalog_runs if run["run_id"] == deck_options["run_id"])
+        deck_key, deck_name = run["playlist_id"], run["name"]
+    else:
+        years = f"{deck_options['year_from'] or 'any'}-{deck_options['year_to'] or 'any'}"
+        deck_key, deck_name = f"catalog:{years}", f"Catalog {years}"
+    if deck.count() == 0:
+        log_error(app_state, f"No catalog tracks for {deck_name}. Please import tracks first.")
+        return
+    generate_deck(app_state, deck, deck_key, deck_name)
+
+def generate_deck(app_state, tracks_source, deck_key, deck_name):
+    """
+    Generate cards for `tracks_source` (a CSV path or CatalogDeck) into
+    generated_cards/, named after `deck_name`. `deck_key` identifies the
+    source deck, so incremental runs of one deck share a folder.
+    """
     try:
-        # Format date and sanitize playlist name
+        # Name the output after the chosen deck (not the playlist currently set)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        sanitized_name = sanitize_filename(app_state.get("playlist_name") or "Unknown_Playlist")
-        output_dir = os.path.join("generated_cards", f"{timestamp}_{sanitized_name}")
+        sanitized_name = sanitize_filename(deck_name)
+        if INCREMENTAL_GENERATION:
+            # Stable folder per source playlist so unchanged pages can be reused;
+            # the key hash keeps decks with the same name apart
+            output_dir = os.path.join(GENERATED_CARDS_DIR, f"{sanitized_name}_{hash_json(deck_key)[:8]}")
+        else:
+            output_dir = os.path.join(GENERATED_CARDS_DIR, f"{timestamp}_{sanitized_name}")
 
         os.makedirs(output_dir, exist_ok=True)
 
-        # Generate HTML cards
-        summary = generate_html_cards(app_state, csv_path, output_dir)
+        # Generate HTML cards (or a single print-ready PDF)
+        if DEFAULT_OUTPUT_FORMAT == OUTPUT_FORMAT_PDF:
+            summary = generate_pdf_cards(app_state, tracks_source, output_dir)
+        else:
+            summary = generate_html_cards(app_state, tracks_source, output_dir, incremental=INCREMENTAL_GENERATION)
         log_success(app_state, summary)
     except Exception as e:
         log_error(app_state, f"Failed to generate cards: {e}")
+        return
+
+    # Mark the run with its source deck (for clean-up), then hardlink its files
+    # into the output store so identical files are kept once
+    try:
+        write_run_marker(output_dir, deck_key, deck_name)
+        stored, saved = store_run_outputs(output_dir)
+        log_info(app_state, f"Stored {stored} files, {saved / (1024 * 1024):.1f} MB shared with earlier runs")
+    except OSError as e:
+        log_error(app_state, f"Failed to store generated files: {e}")
+
+def do_clean_up_runs(app_state):
+    """
+    Delete all but the newest OUTPUT_KEEP_RUNS generated runs of each deck
+    and the stored files no remaining run uses.
+    """
+    try:
+        log_success(app_state, format_gc_summary(collect_garbage(keep_runs=OUTPUT_KEEP_RUNS)))
+    except OSError as e:
+        log_error(app_state, f"Failed to clean up generated cards: {e}")
 
 def do_view_logs(app_state):
     """
@@ -171,6 +279,7 @@ def main():
         "logs": [],
         "playlist_url": None,
         "playlist_name": None,
+        "playlist_metadata": None,
         "track_count": None,
         "imported_tracks_file": None,
         "spotify_client": None
@@ -187,6 +296,8 @@ def main():
         result = create_main_menu(app_state)
         if result == "quit":
             console.print("[bold red]Goodbye![/bold red]")
+            playlist_history.flush()
+            track_count_history.flush()
             break
 
         if result == 0:  # 🎵 Set Playlist URL
@@ -195,11 +306,17 @@ def main():
             set_track_count(app_state)
         elif result == 2:  # 📂 Import Tracks
             do_import_tracks(app_state)
-        elif result == 3:  # 📇 Generate Cards
+        elif result == 3:  # 📦 Batch Import Playlists
+            do_batch_import(app_state)
+        elif result == 4:  # 📇 Generate Cards
             do_generate_cards(app_state)
-        elif result == 4:  # 🪵 View Logs (NEW)
+        elif result == 5:  # 🗂️ Generate Cards from Catalog
+            do_generate_catalog_cards(app_state)
+        elif result == 6:  # 🧹 Clean Up Old Card Runs
+            do_clean_up_runs(app_state)
+        elif result == 7:  # 🪵 View Logs (NEW)
             do_view_logs(app_state)
-        elif result == 5:  # ❓ Help / Usage
+        elif result == 8:  # ❓ Help / Usage
             console.print("[bold cyan]How to Use This App:[/bold cyan]")
             console.print(
                 """
@@ -207,7 +324,11 @@ def main():
     1. Set a Spotify Playlist URL or reuse a previously saved one.
     2. Choose the number of tracks to import (or all available tracks).
     3. Import tracks, which are saved as CSV files in imported_tracks/.
+       Batch Import does this for several playlists (or your whole history) at once.
     4. Generate printable front/back cards (HTML) in generated_cards/.
+       Generate Cards from Catalog builds a deck from an earlier import or from
+       every imported track in a year range (e.g. all 80s songs).
+       Clean Up Old Card Runs keeps the newest runs of each deck and frees the rest.
     5. Print the cards.
     """
             )
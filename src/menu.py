@@ -5,7 +5,8 @@ from prompt_toolkit.layout.containers import HSplit, Window
 from prompt_toolkit.layout.controls import FormattedTextControl
 from prompt_toolkit.styles import Style
 from rich.console import Console
-import os
+from datetime import datetime
+from .import_index import list_imports
 
 console = Console()
 
@@ -14,7 +15,10 @@ MENU_OPTIONS = [
     ("🎵", "Set Playlist URL"),
     ("🎼", "Set Number of Tracks"),
     ("📂", "Import Tracks"),
+    ("📦", "Batch Import Playlists"),
     ("📇", "Generate Cards"),
+    ("🗂️", "Generate Cards from Catalog"),
+    ("🧹", "Clean Up Old Card Runs"),
     ("🪵", "View Logs"),
     ("❓", "Help / Usage"),
     ("❌", "Quit")
@@ -30,7 +34,7 @@ style = Style.from_dict({
 
 def create_main_menu(app_state):
     """
-    Left-aligned main menu. Returns an int (0..4) or "quit".
+    Left-aligned main menu. Returns an int (0..8) or "quit".
     """
     selected_index = [0]
 
@@ -219,6 +223,21 @@ def select_track_count(app_state, track_count_history):
     else:
         return quick_picks[choice]
     
+def select_batch_playlists(playlist_history):
+    """
+    Prompt for the playlists to batch import: several URLs separated by
+    spaces or commas, or an empty line for every playlist in the history.
+    Returns a list of URLs (possibly empty).
+    """
+    console.print(
+        f"[bold cyan]Enter playlist URLs separated by spaces or commas, "
+        f"or press Enter to import all {len(playlist_history)} saved playlists:[/bold cyan]"
+    )
+    user_input = console.input("> ").strip()
+    if not user_input:
+        return [p["url"] for p in playlist_history]
+    return [url for url in user_input.replace(",", " ").split() if url]
+
 def select_imported_csv_file():
     """
     Show a submenu listing all CSV files in 'imported_tracks'.
@@ -277,32 +296,83 @@ def select_imported_csv_file():
     chosen_label, chosen_path = files[choice]
     return chosen_path
 
+def parse_year_input(prompt):
+    """Ask for an optional year; returns an int, or None for a blank answer."""
+    while True:
+        value = console.input(prompt).strip()
+        if not value:
+            return None
+        if value.isdigit():
+            return int(value)
+        console.print("[bold red]Please enter a year such as 1985, or nothing.[/bold red]")
+
+def select_catalog_deck(catalog_runs):
+    """
+    Sub-menu to build a deck from the track catalog: every imported track in a
+    year range (across all playlists, each track once), or one earlier import
+    run from `catalog_runs` (TrackCatalog.list_runs() rows).
+    Returns the track_catalog.CatalogDeck keyword arguments, e.g.
+    {"year_from": 1980, "year_to": 1989} or {"run_id": 12}, or None if cancelled.
+    """
+    options = ["All imported tracks in a year range"] + [
+        f"{datetime.fromtimestamp(run['finished_at']):%Y-%m-%d %H:%M}  {run['name']}  ({run['track_count']} tracks)"
+        for run in catalog_runs
+    ]
+    selected_index = [0]
+
+    def render_menu():
+        lines = []
+        for i, opt in enumerate(options):
+            if i == selected_index[0]:
+                lines.append(("class:menu-selected", opt + "\n"))
+            else:
+                lines.append(("class:menu", opt + "\n"))
+        return lines
+
+    kb = KeyBindings()
+
+    @kb.add("up")
+    def move_up(event):
+        selected_index[0] = (selected_index[0] - 1) % len(options)
+
+    @kb.add("down")
+    def move_down(event):
+        selected_index[0] = (selected_index[0] + 1) % len(options)
+
+    @kb.add("enter")
+    def select_option(event):
+        event.app.exit(result=selected_index[0])
+
+    @kb.add("escape")
+    @kb.add("c-c")
+    def cancel(event):
+        event.app.exit(result=None)
+
+    layout = Layout(Window(FormattedTextControl(render_menu), style="class:menu"))
+    app = Application(layout=layout, key_bindings=kb, full_screen=True, style=style)
+    choice = app.run()
+
+    if choice is None:
+        return None
+    if choice == 0:
+        console.print("[bold cyan]Year range of the deck (press Enter for no limit):[/bold cyan]")
+        return {"year_from": parse_year_input("From year> "), "year_to": parse_year_input("To year> ")}
+    return {"run_id": catalog_runs[choice - 1]["run_id"]}
+
+def format_import_label(entry):
+    """Picker label: creation time, playlist name, row count and size."""
+    created = datetime.fromtimestamp(entry["created"]).strftime("%Y-%m-%d %H:%M")
+    return f"{created}  {entry['playlist_name']}  ({entry['rows']} tracks, {max(1, entry['size'] // 1024)} KB)"
+
 def find_imported_csv_files():
     """
-    Scan the 'imported_tracks' folder for any CSV files in subdirectories.
-    Returns a list of tuples (label, csv_path), e.g.
+    List the imported CSV files under 'imported_tracks', newest first, as
+    (label, csv_path) tuples, e.g.
       [
-        ("20250310_183133_100 -> Metal  Death  Industrial  Progressive_tracks.csv",
+        ("2025-03-10 18:31  Metal | Death | Industrial | Progressive  (100 tracks, 9 KB)",
          "imported_tracks/20250310_183133_100/Metal  Death  Industrial  Progressive_tracks.csv"),
         ...
       ]
+    Served from the import index, which only rescans directories that changed.
     """
-    base_dir = "imported_tracks"
-    if not os.path.isdir(base_dir):
-        return []
-
-    results = []
-    for subdir_name in os.listdir(base_dir):
-        subdir_path = os.path.join(base_dir, subdir_name)
-        if not os.path.isdir(subdir_path):
-            continue
-
-        # Look for CSV files in this subdir
-        for file_name in os.listdir(subdir_path):
-            if file_name.lower().endswith(".csv"):
-                csv_path = os.path.join(subdir_path, file_name)
-                label = f"{subdir_name} -> {file_name}"
-                results.append((label, csv_path))
-
-    return results
-
+    return [(format_import_label(entry), entry["path"]) for entry in list_imports()]
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from .constants import GENERATED_CARDS_DIR, OUTPUT_STORE_DIR, OUTPUT_KEEP_RUNS
+
+# Content-addressed store for generated card files: every file of a run
+# directory (pages, CSS, background, PDF) is stored once as
+# <OUTPUT_STORE_DIR>/<sha256[:2]>/<sha256> and the run directory holds hardlinks
+# to it, so repeated runs of the same deck take almost no extra space. A blob's
+# link count is its reference count: once only the store links to it (st_nlink
+# == 1) no run uses it and collect_garbage() removes it. Where hardlinks are
+# not supported the run keeps its own copies.
+#
+# Every run directory also holds a small run.json marker naming the deck it was
+# generated from (playlist ID, catalog query or CSV path) and when; clean-up
+# groups and orders runs by it, never by folder names.
+
+RUN_MARKER_FILE_NAME = "run.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file_contents(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def blob_path(digest, store_dir=OUTPUT_STORE_DIR):
+    return os.path.join(store_dir, digest[:2], digest)
+
+def detach_output_file(path):
+    """
+    Remove `path` if it is a hardlink shared with the store, so that writing it
+    creates a new file instead of changing the stored blob (and every run
+    linking to it). Card writers call this before overwriting a file in place.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def store_file(path, store_dir=OUTPUT_STORE_DIR):
+    """
+    Move one file's content into the store and leave a hardlink at `path`.
+    Returns the number of bytes saved (the file's size if an identical blob
+    already existed, else 0).
+    """
+    digest = hash_file_contents(path)
+    blob = blob_path(digest, store_dir)
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        temp_blob = f"{blob}.tmp"
+        os.link(path, temp_blob)
+        os.replace(temp_blob, blob)
+        return 0
+    if os.path.samefile(blob, path):
+        return 0
+    temp_path = f"{path}.tmp"
+    os.link(blob, temp_path)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+def write_run_marker(output_dir, deck_key, deck_name):
+    """Record in `output_dir` that it was just generated from the deck `deck_key`."""
+    marker_path = os.path.join(output_dir, RUN_MARKER_FILE_NAME)
+    temp_path = f"{marker_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"deck": deck_key, "name": deck_name, "created": time.time()}, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, marker_path)
+
+def read_run_marker(output_dir):
+    """The run.json marker of `output_dir` as a dict, or None if missing or unreadable."""
+    try:
+        with open(os.path.join(output_dir, RUN_MARKER_FILE_NAME), "r", encoding="utf-8") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return marker if isinstance(marker, dict) and marker.get("deck") and "created" in marker else None
+
+def store_run_outputs(output_dir, store_dir=OUTPUT_STORE_DIR):
+    """
+    Replace every file under `output_dir` with a hardlink into the store.
+    Files that are already hardlinked and the run marker are skipped. Returns
+    (files stored, bytes saved); stops linking, keeping the remaining copies,
+    if the file system has no hardlinks.
+    """
+    stored, saved = 0, 0
+    for root, _, file_names in os.walk(output_dir):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            if file_name == RUN_MARKER_FILE_NAME or os.stat(path).st_nlink > 1:
+                continue
+            try:
+                saved += store_file(path, store_dir)
+            except OSError:
+                return stored, saved
+            stored += 1
+    return stored, saved
+
+def list_runs(base_dir=GENERATED_CARDS_DIR):
+    """
+    Run directories grouped by source deck: {deck key: [run paths, newest
+    first]}, using each run's marker and the creation time it records.
+    Directories without a marker (generated before markers existed, or by
+    hand) form a group of their own, so they are never deleted as an older
+    run of something else.
+    """
+    runs = {}
+    if not os.path.isdir(base_dir):
+        return runs
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        marker = read_run_marker(path)
+        if marker is None:
+            runs[("unmarked", path)] = [(0, path)]
+        else:
+            runs.setdefault(marker["deck"], []).append((marker["created"], path))
+    return {deck: [path for _, path in sorted(deck_runs, reverse=True)] for deck, deck_runs in runs.items()}
+
+def remove_unreferenced_blobs(store_dir=OUTPUT_STORE_DIR):
+    """Delete blobs no run links to anymore; returns (blobs removed, bytes freed)."""
+    removed, freed = 0, 0
+    if not os.path.isdir(store_dir):
+        return removed, freed
+    for root, _, file_names in os.walk(store_dir):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            stat = os.stat(path)
+            if stat.st_nlink == 1:
+                os.remove(path)
+                removed += 1
+                freed += stat.st_size
+    return removed, freed
+
+def collect_garbage(keep_runs=OUTPUT_KEEP_RUNS, base_dir=GENERATED_CARDS_DIR, store_dir=OUTPUT_STORE_DIR):
+    """
+    Keep the newest `keep_runs` runs of each deck and delete the rest,
+    then free the blobs nothing links to. Kept runs written before the store
+    existed are moved into it first. Returns a summary dict.
+    """
+    result = {"runs_removed": 0, "runs_kept": 0, "files_stored": 0, "blobs_removed": 0, "bytes_freed": 0}
+    for deck_runs in list_runs(base_dir).values():
+        for path in deck_runs[keep_runs:]:
+            shutil.rmtree(path)
+            result["runs_removed"] += 1
+        for path in deck_runs[:keep_runs]:
+            stored, saved = store_run_outputs(path, store_dir)
+            result["files_stored"] += stored
+            result["bytes_freed"] += saved
+            result["runs_kept"] += 1
+    removed, freed = remove_unreferenced_blobs(store_dir)
+    result["blobs_removed"] = removed
+    result["bytes_freed"] += freed
+    return result
+
+def format_gc_summary(result):
+    return (
+        f"Kept {result['runs_kept']} runs, removed {result['runs_removed']} runs and "
+        f"{result['blobs_removed']} unused files, freed {result['bytes_freed'] / (1024 * 1024):.1f} MB"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the generated card output store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser("gc", help="delete old runs and unreferenced blobs")
+    gc_parser.add_argument("--keep", type=int, default=OUTPUT_KEEP_RUNS, help="runs to keep per deck")
+    args = parser.parse_args()
+
+    if args.command == "gc":
+        print(f"[INFO] {format_gc_summary(collect_garbage(keep_runs=args.keep))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import os
+import math
+from reportlab.lib.colors import HexColor, Color
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from .logger import log_info, log_error, log_success
+from .constants import (
+    BACKGROUND_IMAGE_PATH,
+    BACKGROUND_DPI,
+    BACKGROUND_FORMAT,
+    CARD_WIDTH_MM,
+    CARD_HEIGHT_MM,
+    PDF_FONT_PATH,
+    PDF_BOLD_FONT_PATH,
+)
+from .card_utils import (
+    CARDS_PER_PAGE,
+    CARD_QR_OPTIONS,
+    build_qr_code,
+    chunk_iterable,
+    count_source_tracks,
+    iter_source_tracks,
+    resolve_track_source,
+    mirror_columns_per_row,
+    pick_random_gradient,
+)
+from .image_utils import prepare_background_image
+from .output_store import detach_output_file
+
+# Page geometry, mirroring templates/cards.css: a 3x4 grid of 60mm cards with
+# 4mm cutting gaps, centered on A4.
+GRID_COLUMNS = 3
+GRID_ROWS = 4
+CARD_GAP_MM = 4
+QR_SIZE_MM = 35
+SERIAL_TEXT_COLOR = HexColor("#333333")
+
+def register_fonts():
+    """
+    Return (regular, bold) font names. The standard Helvetica fonts only cover
+    Latin-1, so set PDF_FONT_PATH/PDF_BOLD_FONT_PATH to a TTF (e.g. DejaVuSans)
+    for full Unicode artist and song names.
+    """
+    if not PDF_FONT_PATH:
+        return "Helvetica", "Helvetica-Bold"
+    pdfmetrics.registerFont(TTFont("CardFont", PDF_FONT_PATH))
+    pdfmetrics.registerFont(TTFont("CardFont-Bold", PDF_BOLD_FONT_PATH or PDF_FONT_PATH))
+    return "CardFont", "CardFont-Bold"
+
+def card_positions(page_width, page_height):
+    """Return the bottom-left (x, y) of each card slot, in reading order (row by row, top first)."""
+    card_w, card_h = CARD_WIDTH_MM * mm, CARD_HEIGHT_MM * mm
+    gap = CARD_GAP_MM * mm
+    grid_w = GRID_COLUMNS * card_w + (GRID_COLUMNS - 1) * gap
+    grid_h = GRID_ROWS * card_h + (GRID_ROWS - 1) * gap
+    left = (page_width - grid_w) / 2
+    top = (page_height + grid_h) / 2
+    positions = []
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLUMNS):
+            x = left + col * (card_w + gap)
+            y = top - (row + 1) * card_h - row * gap
+            positions.append((x, y))
+    return positions
+
+def draw_gradient(c, x, y, width, height, direction, stops):
+    """
+    Fill a card with a CSS-style linear-gradient(direction, stops). CSS angles
+    run clockwise from "to top"; stops outside 0-100% extend the gradient line.
+    """
+    angle = math.radians(direction)
+    dx, dy = math.sin(angle), math.cos(angle)  # PDF y axis points up, like "to top"
+    half_length = (abs(width * dx) + abs(height * dy)) / 2
+    cx, cy = x + width / 2, y + height / 2
+
+    offsets = [offset / 100 for _, offset in stops]
+    first, last = offsets[0], offsets[-1]
+    span = (last - first) or 1
+
+    def point_at(t):
+        distance = (t - 0.5) * 2 * half_length
+        return cx + dx * distance, cy + dy * distance
+
+    x0, y0 = point_at(first)
+    x1, y1 = point_at(last)
+    c.saveState()
+    clip = c.beginPath()
+    clip.rect(x, y, width, height)
+    c.clipPath(clip, stroke=0, fill=0)
+    c.linearGradient(
+        x0, y0, x1, y1,
+        [HexColor(color) for color, _ in stops],
+        positions=[(offset - first) / span for offset in offsets],
+        extend=True
+    )
+    c.restoreState()
+
+def draw_fitted_text(c, text, font, max_size, min_size, center_x, y, max_width, max_lines=2):
+    """
+    Draw `text` centered at `center_x`, shrinking the font until it fits in
+    `max_lines` lines of `max_width`. Lines stack downward from baseline `y`.
+    """
+    size = max_size
+    lines = simpleSplit(text, font, size, max_width)
+    while size > min_size and (len(lines) > max_lines or any(
+            pdfmetrics.stringWidth(line, font, size) > max_width for line in lines)):
+        size -= 0.5
+        lines = simpleSplit(text, font, size, max_width)
+    c.setFont(font, size)
+    for i, line in enumerate(lines[:max_lines]):
+        c.drawCentredString(center_x, y - i * size * 1.15, line)
+
+def draw_card_front(c, track, x, y, fonts):
+    """Gradient card with artist (top), year (middle), song name (bottom) and serial number."""
+    regular, bold = fonts
+    width, height = CARD_WIDTH_MM * mm, CARD_HEIGHT_MM * mm
+    direction, stops = pick_random_gradient()
+    draw_gradient(c, x, y, width, height, direction, stops)
+
+    center_x = x + width / 2
+    text_width = width - 6 * mm
+    c.setFillColor(Color(0, 0, 0))
+    draw_fitted_text(c, track["artist"], bold, 12, 6, center_x, y + height - 7 * mm, text_width)
+    c.setFont(bold, 36)
+    c.drawCentredString(center_x, y + height / 2 - 12, track["year"])
+    draw_fitted_text(c, track["song_name"], regular, 10, 5, center_x, y + 10 * mm, text_width)
+
+    c.setFillColor(SERIAL_TEXT_COLOR)
+    c.setFont(regular, 5)
+    c.drawString(x + 1 * mm, y + 1 * mm, track["serial_number"])
+
+def draw_qr_vector(c, matrix, x, y, size):
+    """Draw a QR module matrix as one vector path (merged horizontal runs) on a white square."""
+    modules = len(matrix)
+    module_size = size / modules
+    c.setFillColor(Color(1, 1, 1))
+    c.rect(x, y, size, size, stroke=0, fill=1)
+
+    path = c.beginPath()
+    for row_index, row in enumerate(matrix):
+        col = 0
+        while col < modules:
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < modules and row[col]:
+                col += 1
+            # Matrix rows run top-down, PDF y runs bottom-up.
+            path.rect(
+                x + start * module_size,
+                y + size - (row_index + 1) * module_size,
+                (col - start) * module_size,
+                module_size
+            )
+    c.setFillColor(Color(0, 0, 0))
+    c.drawPath(path, stroke=0, fill=1)
+
+def draw_background_cover(c, background, x, y, width, height):
+    """
+    Draw the shared background image clipped to the card, scaled like CSS
+    `background-size: cover`. ReportLab embeds the image once per document
+    and references it from every card.
+    """
+    image_w, image_h = background.getSize()
+    scale = max(width / image_w, height / image_h)
+    draw_w, draw_h = image_w * scale, image_h * scale
+    c.saveState()
+    clip = c.beginPath()
+    clip.rect(x, y, width, height)
+    c.clipPath(clip, stroke=0, fill=0)
+    c.drawImage(background, x + (width - draw_w) / 2, y + (height - draw_h) / 2, draw_w, draw_h)
+    c.restoreState()
+
+def draw_card_back(c, track, x, y, background, fonts):
+    """Background image with a centered vector QR code and the serial number."""
+    regular, _ = fonts
+    width, height = CARD_WIDTH_MM * mm, CARD_HEIGHT_MM * mm
+    draw_background_cover(c, background, x, y, width, height)
+
+    qr_options = CARD_QR_OPTIONS
+    qr = build_qr_code(
+        track["url"],
+        qr_options["version"],
+        qr_options["error_correction"],
+        qr_options["box_size"],
+        qr_options["border"]
+    )
+    qr_size = QR_SIZE_MM * mm
+    draw_qr_vector(c, qr.get_matrix(), x + (width - qr_size) / 2, y + (height - qr_size) / 2, qr_size)
+
+    c.setFillColor(SERIAL_TEXT_COLOR)
+    c.setFont(regular, 5)
+    c.drawString(x + 1 * mm, y + 1 * mm, track["serial_number"])
+
+def generate_pdf_cards(
+        app_state,
+        tracks_source,
+        output_dir,
+        background_dpi=BACKGROUND_DPI,
+        background_format=BACKGROUND_FORMAT):
+    """
+    Render the deck (a tracks CSV path or a catalog deck) as a single
+    duplex-ready A4 PDF (deck.pdf): a front page followed by its back page,
+    with columns mirrored for long-edge flipping.
+    QR codes are vector paths and the background is one shared image object.
+    """
+    tracks_source = resolve_track_source(tracks_source)
+    track_count = count_source_tracks(tracks_source)
+    page_count = math.ceil(track_count / CARDS_PER_PAGE)
+    if page_count == 0:
+        log_error(app_state, "No tracks found, nothing to generate.")
+        return "No tracks to generate."
+
+    background_path = BACKGROUND_IMAGE_PATH
+    if background_dpi is not None:
+        background_path = prepare_background_image(
+            app_state, BACKGROUND_IMAGE_PATH, dpi=background_dpi, image_format=background_format
+        )
+    background = ImageReader(background_path)
+    fonts = register_fonts()
+
+    pdf_path = os.path.join(output_dir, "deck.pdf")
+    detach_output_file(pdf_path)
+    page_width, page_height = A4
+    positions = card_positions(page_width, page_height)
+    back_positions = mirror_columns_per_row(positions, columns=GRID_COLUMNS)
+    c = canvas.Canvas(pdf_path, pagesize=A4, pageCompression=1)
+    c.setTitle(f"Hitster cards ({track_count} tracks)")
+
+    for i, page_tracks in enumerate(chunk_iterable(iter_source_tracks(tracks_source), CARDS_PER_PAGE), start=1):
+        for track, (x, y) in zip(page_tracks, positions):
+            draw_card_front(c, track, x, y, fonts)
+        c.showPage()
+
+        # Mirror the slots for the back (flip on long edge); mirroring positions rather
+        # than tracks keeps a short last row aligned with its fronts.
+        for track, (x, y) in zip(page_tracks, back_positions):
+            draw_card_back(c, track, x, y, background, fonts)
+        c.showPage()
+        log_info(app_state, f"Rendered PDF page {i} of {page_count} (front/back)")
+
+    c.save()
+    summary = f"{track_count} tracks across {page_count} pages, saved in {pdf_path}"
+    log_success(app_state, summary)
+    return summary
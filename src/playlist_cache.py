@@ -0,0 +1,88 @@
+import os
+import json
+from .constants import PLAYLIST_CACHE_DIR
+
+class PlaylistCache:
+    """
+    Local cache of parsed playlist tracks, keyed by playlist ID.
+
+    Each playlist is stored as <id>.json (snapshot_id, name, market, whether
+    the whole playlist was fetched) plus <id>.tracks.jsonl with one parsed track
+    per line. Spotify changes a playlist's snapshot_id whenever its contents
+    change, so a matching snapshot means the cached tracks are still accurate.
+    """
+
+    def __init__(self, cache_dir=PLAYLIST_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, playlist_id):
+        base = os.path.join(self.cache_dir, playlist_id)
+        return f"{base}.json", f"{base}.tracks.jsonl"
+
+    def load_metadata(self, playlist_id):
+        """Return the cached metadata dict for `playlist_id`, or None."""
+        meta_path, tracks_path = self._paths(playlist_id)
+        if not (os.path.exists(meta_path) and os.path.exists(tracks_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def has_tracks(self, playlist_id, snapshot_id, desired_count, market):
+        """
+        True if the cache matches `snapshot_id` and `market` and holds at least
+        `desired_count` tracks (an int, or None for the whole playlist).
+        """
+        meta = self.load_metadata(playlist_id)
+        if meta is None or meta.get("snapshot_id") != snapshot_id or meta.get("market") != market:
+            return False
+        return bool(meta.get("complete")) or (
+            desired_count is not None and meta.get("track_count", 0) >= desired_count
+        )
+
+    def iter_tracks(self, playlist_id, desired_count=None):
+        """Lazily yield up to `desired_count` cached tracks (None for all)."""
+        _, tracks_path = self._paths(playlist_id)
+        with open(tracks_path, "r", encoding="utf-8") as f:
+            for count, line in enumerate(f):
+                if desired_count is not None and count >= desired_count:
+                    break
+                yield json.loads(line)
+
+    def store_iter(self, playlist_id, snapshot_id, name, market, tracks, desired_count):
+        """
+        Pass `tracks` through while streaming them to the cache. The entry is
+        only committed (atomically) once `tracks` is exhausted; if it fails or
+        is abandoned part-way the previous entry is left untouched. Fewer than
+        `desired_count` tracks (or desired_count None) means the whole playlist
+        was fetched.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, tracks_path = self._paths(playlist_id)
+        temp_path = f"{tracks_path}.tmp"
+
+        track_count = 0
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for track in tracks:
+                    f.write(json.dumps(track, ensure_ascii=False) + "\n")
+                    track_count += 1
+                    yield track
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        os.replace(temp_path, tracks_path)
+
+        meta = {
+            "playlist_id": playlist_id,
+            "snapshot_id": snapshot_id,
+            "name": name,
+            "market": market,
+            "complete": desired_count is None or track_count < desired_count,
+            "track_count": track_count,
+        }
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        os.replace(f"{meta_path}.tmp", meta_path)
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from .constants import QR_CACHE_PATH, QR_CACHE_MAX_BYTES
+
+class QRCodeCache:
+    """
+    Persistent, content-addressed cache of rendered QR codes backed by SQLite.
+
+    Entries are keyed by a hash of the URL and every rendering option, so a
+    change to any option simply misses. The total payload is kept under
+    `max_bytes` by evicting the least recently used entries on close().
+    Writes are batched into a single transaction per generation run.
+    """
+
+    def __init__(self, path=QR_CACHE_PATH, max_bytes=QR_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS qr_codes ("
+            " key TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_qr_codes_last_used ON qr_codes (last_used)")
+
+    @staticmethod
+    def make_key(url, options):
+        """Hash the URL together with the rendering options (order-independent)."""
+        payload = json.dumps([url, sorted(options.items())], default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for `key` or None, updating its LRU timestamp."""
+        row = self.conn.execute("SELECT data FROM qr_codes WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE qr_codes SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key, data):
+        """Store `data` under `key`."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO qr_codes (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time())
+        )
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes. Returns the count removed."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM qr_codes").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        stale_keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM qr_codes ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM qr_codes WHERE key = ?", stale_keys)
+        return len(stale_keys)
+
+    def stats_summary(self):
+        return f"QR cache: {self.hits} hits, {self.misses} misses"
+
+    def close(self):
+        """Evict down to the size cap, commit pending writes and close the database."""
+        self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,150 @@
+import time
+import random
+import threading
+import requests
+from spotipy.exceptions import SpotifyException
+from .constants import (
+    SPOTIFY_MAX_REQUESTS_PER_SECOND,
+    SPOTIFY_MIN_REQUESTS_PER_SECOND,
+    SPOTIFY_MAX_RETRIES,
+    SPOTIFY_BACKOFF_BASE_SECONDS,
+    SPOTIFY_BACKOFF_MAX_SECONDS,
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks until a token is available. pause() holds
+    every caller back until a point in time (used for 429 Retry-After).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping as needed. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Block all callers for at least `seconds` from now."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+class SpotifyRateLimiter:
+    """
+    Shared pacing and retry layer for Spotify API calls.
+
+    Requests go through a token bucket whose rate adapts: it is halved on every
+    429 (down to a floor) and creeps back up on success. 429 responses honor
+    `Retry-After`; 5xx responses and network errors are retried with jittered
+    exponential backoff. Only the failed call is retried, and once retries are
+    exhausted the error is raised instead of being swallowed.
+
+    If `on_unauthorized` is set, a 401 calls it (e.g. to drop an expired access
+    token) and the request is retried once.
+    """
+
+    def __init__(
+            self,
+            max_rate=SPOTIFY_MAX_REQUESTS_PER_SECOND,
+            min_rate=SPOTIFY_MIN_REQUESTS_PER_SECOND,
+            max_retries=SPOTIFY_MAX_RETRIES,
+            backoff_base=SPOTIFY_BACKOFF_BASE_SECONDS,
+            backoff_max=SPOTIFY_BACKOFF_MAX_SECONDS):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(max_rate, capacity=max_rate)
+        self.stats_lock = threading.Lock()
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.on_unauthorized = None
+
+    def _record(self, throttled=0.0, retried=False, rate_limited=False):
+        with self.stats_lock:
+            self.throttled_seconds += throttled
+            self.retries += int(retried)
+            self.rate_limited += int(rate_limited)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _slow_down(self):
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def _speed_up(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + 0.5)
+
+    def call(self, func, *args, **kwargs):
+        """Call `func(*args, **kwargs)` with pacing and retries; returns its result."""
+        reauthorized = False
+        attempt = 0  # the one re-authorization retry after a 401 is not counted
+        while True:
+            self._record(throttled=self.bucket.acquire())
+            try:
+                result = func(*args, **kwargs)
+                self._speed_up()
+                return result
+            except SpotifyException as e:
+                if e.http_status == 401 and self.on_unauthorized is not None and not reauthorized:
+                    self.on_unauthorized()
+                    reauthorized = True
+                    self._record(retried=True)
+                    continue
+                if e.http_status not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                if e.http_status == 429:
+                    retry_after = parse_retry_after(e.headers)
+                    delay = retry_after if retry_after is not None else self._backoff(attempt)
+                    self._slow_down()
+                    self.bucket.pause(delay)
+                    self._record(retried=True, rate_limited=True)
+                    attempt += 1
+                    continue
+                delay = self._backoff(attempt)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            self._record(throttled=delay, retried=True)
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        """Snapshot of (throttled seconds, retries, 429 responses)."""
+        with self.stats_lock:
+            return self.throttled_seconds, self.retries, self.rate_limited
+
+def parse_retry_after(headers):
+    """Return the Retry-After header in seconds, or None if absent/invalid."""
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from .constants import CACHE_DIR
+
+# Local stand-in for the parts of the Spotify Web API the importer uses:
+#   POST /api/token                    client-credentials token
+#   GET  /v1/playlists/<id>            name, snapshot_id, tracks.total
+#   GET  /v1/playlists/<id>/tracks     paged playlist items
+#   GET  /v1/search                    empty result (connection test)
+#
+# Playlists named "synthetic<N>" (e.g. synthetic10000) have N generated tracks;
+# any other ID is loaded from <fixtures_dir>/<id>.json, a recording written by
+# record_playlist_fixture(). Point the app at it with
+#   init_spotify_client(app_state, api_url=server.api_url, auth_url=server.auth_url,
+#                       token_cache_path=STANDIN_TOKEN_CACHE_PATH)
+# or the SPOTIFY_API_URL / SPOTIFY_AUTH_URL / SPOTIFY_TOKEN_CACHE_PATH
+# environment variables. A separate token cache keeps the real cached Spotify
+# token intact.
+
+SYNTHETIC_PREFIX = "synthetic"
+STANDIN_TOKEN_CACHE_PATH = os.path.join(CACHE_DIR, "standin_token.json")
+DEFAULT_PAGE_SIZE = 100
+
+def synthetic_track(index):
+    """Deterministic track object for position `index` of a synthetic playlist."""
+    return {
+        "name": f"Synthetic Song {index + 1}",
+        "is_playable": True,
+        "artists": [{"name": f"Synthetic Artist {index % 500 + 1}"}],
+        "album": {"release_date": f"{1950 + index % 75}-01-01"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{index:022d}"},
+        "external_ids": {"isrc": f"ZZSYN{index % 10_000_000:07d}"},
+    }
+
+def record_playlist_fixture(sp, playlist_id, fixtures_dir):
+    """
+    Download a real playlist through the spotipy client `sp` and save it as
+    <fixtures_dir>/<playlist_id>.json for the stand-in to serve offline.
+    """
+    playlist = sp.playlist(playlist_id, fields="name,snapshot_id")
+    items = []
+    results = sp.playlist_items(playlist_id, limit=DEFAULT_PAGE_SIZE)
+    while results:
+        items.extend(results["items"])
+        results = sp.next(results) if results.get("next") else None
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"{playlist_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": playlist["name"], "snapshot_id": playlist["snapshot_id"], "items": items}, f)
+    return path
+
+class SpotifyStandIn:
+    """
+    Threaded HTTP server imitating Spotify's token and playlist endpoints.
+
+    `latency` seconds are added to every response and pages hold at most
+    `page_size` items. A seeded random share of API requests is answered with
+    429 (`rate_limit_ratio`, with `retry_after`) or 503 (`server_error_ratio`),
+    so retry behavior is reproducible. Request counts are kept in `stats`.
+    """
+
+    def __init__(
+            self,
+            host="127.0.0.1",
+            port=0,
+            fixtures_dir=None,
+            latency=0.0,
+            page_size=DEFAULT_PAGE_SIZE,
+            rate_limit_ratio=0.0,
+            server_error_ratio=0.0,
+            retry_after=1,
+            seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.page_size = page_size
+        self.rate_limit_ratio = rate_limit_ratio
+        self.server_error_ratio = server_error_ratio
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.fixtures = {}
+        self.stats = {"requests": 0, "tokens": 0, "rate_limited": 0, "server_errors": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/v1/"
+
+    @property
+    def auth_url(self):
+        return f"{self.base_url}/api/token"
+
+    def start(self):
+        """Serve in a background thread; returns self so it can be chained."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _injected_error(self):
+        """Return the status code to fail this request with, or None."""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.rate_limit_ratio:
+            self._count("rate_limited")
+            return 429
+        if roll < self.rate_limit_ratio + self.server_error_ratio:
+            self._count("server_errors")
+            return 503
+        return None
+
+    def _playlist(self, playlist_id):
+        """Return (name, snapshot_id, total, item_getter) or None for unknown playlists."""
+        suffix = playlist_id[len(SYNTHETIC_PREFIX):]
+        if playlist_id.startswith(SYNTHETIC_PREFIX) and suffix.isdigit():
+            total = int(suffix)
+            return (
+                f"Synthetic playlist ({total} tracks)",
+                f"{playlist_id}-v1",
+                total,
+                lambda start, stop: [{"track": synthetic_track(i)} for i in range(start, stop)]
+            )
+        with self.lock:
+            fixture = self.fixtures.get(playlist_id)
+        if fixture is None and self.fixtures_dir:
+            path = os.path.join(self.fixtures_dir, f"{os.path.basename(playlist_id)}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    fixture = json.load(f)
+                with self.lock:
+                    self.fixtures[playlist_id] = fixture
+        if fixture is None:
+            return None
+        items = fixture["items"]
+        return fixture["name"], fixture["snapshot_id"], len(items), lambda start, stop: items[start:stop]
+
+    def _page(self, playlist_id, playlist, query):
+        _, _, total, get_items = playlist
+        offset = int(query.get("offset", ["0"])[0])
+        limit = min(int(query.get("limit", [str(self.page_size)])[0]), self.page_size)
+        stop = min(total, offset + limit)
+        next_url = None
+        if stop < total:
+            next_url = f"{self.api_url}playlists/{playlist_id}/tracks?offset={stop}&limit={limit}"
+        return {
+            "items": get_items(offset, stop) if offset < total else [],
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next": next_url,
+        }
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_error(self, status, message, headers=None):
+                self._send_json(status, {"error": {"status": status, "message": message}}, headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                standin._count("requests")
+                if urlsplit(self.path).path != "/api/token":
+                    self._send_error(404, "Not found")
+                    return
+                standin._count("tokens")
+                self._send_json(200, {
+                    "access_token": f"standin-{time.time_ns()}",
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                })
+
+            def do_GET(self):
+                standin._count("requests")
+                if standin.latency:
+                    time.sleep(standin.latency)
+                url = urlsplit(self.path)
+                parts = [part for part in url.path.split("/") if part]
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    self._send_error(401, "No token provided")
+                    return
+
+                status = standin._injected_error()
+                if status == 429:
+                    self._send_error(429, "API rate limit exceeded", {"Retry-After": str(standin.retry_after)})
+                    return
+                if status is not None:
+                    self._send_error(status, "Service unavailable")
+                    return
+
+                if parts == ["v1", "search"]:
+                    self._send_json(200, {"tracks": {"items": [], "total": 0, "next": None}})
+                    return
+                if len(parts) in (3, 4) and parts[:2] == ["v1", "playlists"]:
+                    playlist = standin._playlist(parts[2])
+                    if playlist is None:
+                        self._send_error(404, "Not found.")
+                        return
+                    if len(parts) == 3:
+                        name, snapshot_id, total, _ = playlist
+                        self._send_json(200, {"name": name, "snapshot_id": snapshot_id, "tracks": {"total": total}})
+                        return
+                    if parts[3] == "tracks":
+                        self._send_json(200, standin._page(parts[2], playlist, parse_qs(url.query)))
+                        return
+                self._send_error(404, "Not found")
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Spotify token and playlist API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=None, help="directory of recorded <playlist_id>.json files")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API response")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--server-error-ratio", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    standin = SpotifyStandIn(
+        port=args.port,
+        fixtures_dir=args.fixtures,
+        latency=args.latency,
+        page_size=args.page_size,
+        rate_limit_ratio=args.rate_limit_ratio,
+        server_error_ratio=args.server_error_ratio,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    print(f"[INFO] Spotify stand-in listening on {standin.base_url}")
+    print(
+        f"[INFO] export SPOTIFY_API_URL={standin.api_url} SPOTIFY_AUTH_URL={standin.auth_url} "
+        f"SPOTIFY_TOKEN_CACHE_PATH={STANDIN_TOKEN_CACHE_PATH}"
+    )
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,55 @@
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from spotipy import Spotify
 from spotipy.oauth2 import SpotifyClientCredentials
-from .spotify_auth import get_spotify_token
+from .spotify_auth import SpotifyTokenManager
+from .http_session import get_http_session
 from .logger import log_info, log_error
-
-def init_spotify_client(app_state):
-    """Initialize a Spotify client and return it."""
+from .constants import (
+    SPOTIFY_PAGE_SIZE,
+    PLAYLIST_FETCH_WORKERS,
+    SPOTIFY_MARKET,
+    PLAYLIST_ITEM_FIELDS,
+    HTTP_TIMEOUT_SECONDS,
+    SPOTIFY_API_URL,
+    SPOTIFY_AUTH_URL,
+    SPOTIFY_TOKEN_CACHE_PATH,
+)
+from .rate_limiter import SpotifyRateLimiter
+
+# One limiter shared by every Spotify call (and thread) in the app.
+rate_limiter = SpotifyRateLimiter()
+
+def init_spotify_client(app_state, api_url=SPOTIFY_API_URL, auth_url=SPOTIFY_AUTH_URL,
+                        token_cache_path=SPOTIFY_TOKEN_CACHE_PATH):
+    """
+    Initialize a Spotify client and return it. The token manager reuses a
+    cached access token when one is still valid and refreshes it near expiry
+    or after a 401, so long sessions keep working. Token and API requests
+    share one pooled HTTP session, so connections stay warm between calls.
+
+    `api_url` and `auth_url` default to Spotify's endpoints; point them at a
+    local stand-in (src/spotify_standin.py) to run without network access,
+    together with a separate `token_cache_path` so the stand-in's token does
+    not replace the cached Spotify one.
+    """
     try:
-        token = get_spotify_token(app_state)
-        sp = Spotify(auth=token)
+        session = get_http_session()
+        token_manager = SpotifyTokenManager(
+            app_state, cache_path=token_cache_path, session=session, auth_url=auth_url
+        )
+        token_manager.get_access_token()  # fail fast on bad credentials
+        rate_limiter.on_unauthorized = token_manager.invalidate
+        # Retries and 429 handling live in rate_limiter, so spotipy's own are disabled.
+        sp = Spotify(
+            auth_manager=token_manager,
+            requests_session=session,
+            requests_timeout=HTTP_TIMEOUT_SECONDS,
+            retries=0,
+            status_retries=0
+        )
+        sp.prefix = api_url
         log_info(app_state, "Spotify client successfully initialized.")
         return sp
     except Exception as e:
@@ -19,103 +60,147 @@ def test_spotify_connection(app_state, sp):
     """Simple test of the Spotify API connection."""
     try:
         log_info(app_state, "Testing Spotify API connection...")
-        sp.search(q="test", type="track", limit=1)
+        rate_limiter.call(sp.search, q="test", type="track", limit=1)
         log_info(app_state, "Spotify API connection test successful.")
         return True
     except Exception as e:
         log_error(app_state, f"Spotify connection test failed: {e}")
         return False
 
-def fetch_playlist_name(app_state, sp, playlist_id):
-    """Return the actual playlist name from Spotify."""
-    playlist = sp.playlist(playlist_id, fields='name')
-    name = playlist["name"]
-    log_info(app_state, f"Fetched playlist name: {name}")
-    return name
+def fetch_playlist_metadata(app_state, sp, playlist_id):
+    """
+    Return the playlist's name, snapshot_id and track total in one lightweight
+    request. The snapshot_id changes whenever the playlist's contents change.
+    """
+    playlist = rate_limiter.call(sp.playlist, playlist_id, fields="name,snapshot_id,tracks(total)")
+    metadata = {
+        "name": playlist["name"],
+        "snapshot_id": playlist.get("snapshot_id"),
+        "total": (playlist.get("tracks") or {}).get("total"),
+    }
+    log_info(app_state, f"Fetched playlist metadata: {metadata['name']} (snapshot {metadata['snapshot_id']})")
+    return metadata
 
 def extract_id_from_url(url):
     """Extract the ID portion from a Spotify URL."""
     return url.split("/")[-1].split("?")[0]
 
-def fetch_playlist_tracks(app_state, sp, playlist_url, desired_count=100):
+def parse_playlist_item(item):
     """
-    Fetch track data from a Spotify playlist, paginating if necessary.
-    desired_count can be an integer or the string 'all'.
-    If desired_count > 100, we fetch multiple times in chunks of 100.
+    Turn one playlist item into a track dict, or None if it can't become a card
+    (no track, marked not playable, or missing its Spotify URL).
+    """
+    track = item.get("track")
+    if not track:
+        return None
+    if track.get("is_playable") is False or not track.get("external_urls", {}).get("spotify"):
+        return None
+    return {
+        "artist": track["artists"][0]["name"],
+        "song_name": track["name"],
+        "year": (track["album"].get("release_date") or "Unknown").split("-")[0],
+        "url": track["external_urls"]["spotify"],
+        "isrc": (track.get("external_ids") or {}).get("isrc")
+    }
+
+def fetch_playlist_page(sp, playlist_id, offset, limit=SPOTIFY_PAGE_SIZE, market=SPOTIFY_MARKET):
+    """
+    Fetch one page of playlist items, validating the response shape.
+    Only PLAYLIST_ITEM_FIELDS are requested; passing `market` makes Spotify
+    fill in `is_playable` for that market.
+    """
+    results = rate_limiter.call(
+        sp.playlist_items,
+        playlist_id,
+        fields=PLAYLIST_ITEM_FIELDS,
+        limit=limit,
+        offset=offset,
+        market=market
+    )
+    if "items" not in results:
+        raise ValueError(f"Unexpected API response: {results}")
+    return results
+
+def iter_playlist_tracks(
+        app_state,
+        sp,
+        playlist_url,
+        desired_count=None,
+        workers=PLAYLIST_FETCH_WORKERS,
+        market=SPOTIFY_MARKET,
+        on_page=None):
+    """
+    Yield track dicts from a Spotify playlist as each page arrives, in
+    playlist order. desired_count can be an integer, or None / 'all' for the
+    whole playlist (no upper limit).
+
+    The first page tells us the playlist `total`, so later offsets are known
+    up front; up to `workers` requests run concurrently and at most
+    2 * `workers` pages are held at a time, so memory stays flat however long
+    the playlist is. `on_page(item_count, total)` is called for every page
+    received (unplayable items included), for progress reporting.
+
+    All requests are paced and retried by the shared rate limiter; if a page
+    still fails the error is raised mid-stream rather than silently truncating.
+    Tracks that are not playable in `market` are skipped.
     """
-    from .logger import log_info, log_error
-    from .spotify_utils import extract_id_from_url
-    import time
-
     log_info(app_state, f"Fetching tracks from playlist: {playlist_url}")
     playlist_id = extract_id_from_url(playlist_url)
+    unlimited = desired_count is None or str(desired_count).lower() == "all"
+    desired_count = None if unlimited else int(desired_count)
 
-    # Check if user chose 'all'
-    unlimited = (str(desired_count).lower() == 'all')
-    if unlimited:
-        desired_count = 10_000  # Some large number to ensure we grab all
-    else:
-        desired_count = int(desired_count)
-
-    all_tracks = []
-    offset = 0
-    batch_size = 100  # Max Spotify limit per request
-
-    while True:
-        try:
-            # Calculate how many tracks are still needed
-            remaining = desired_count - len(all_tracks)
-            if remaining <= 0:
-                break  # We already fetched enough
-
-            current_limit = min(batch_size, remaining)  # Ensure we don’t fetch more than needed
-
-            log_info(app_state, f"Batch fetch: offset={offset}, limit={current_limit}")
-
-            results = sp.playlist_items(
-                playlist_id,
-                limit=current_limit,
-                offset=offset
-            )
+    batch_size = SPOTIFY_PAGE_SIZE  # Max Spotify limit per request
+    throttled_before, retries_before, _ = rate_limiter.stats()
+    yielded = 0
 
-            if "items" not in results:
-                log_error(app_state, f"Unexpected API response: {results}")
-                break  # Stop if the response is invalid
+    log_info(app_state, f"Batch fetch: offset=0, limit={batch_size}")
+    first_page = fetch_playlist_page(sp, playlist_id, 0, batch_size, market)
+    total = first_page.get("total") or 0
+    next_offset = len(first_page["items"])
 
-            items = results.get("items", [])
-            if not items:
-                break  # No more tracks
-
-            for item in items:
-                track = item.get("track")
-                if not track:
-                    continue
-                # Skip the track if it's marked as not playable or missing its Spotify URL.
-                if track.get("is_playable") is False or not track.get("external_urls", {}).get("spotify"):
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    in_flight = deque()
+    results = first_page
+    try:
+        while results is not None:
+            if on_page is not None:
+                on_page(len(results["items"]), total)
+            for item in results["items"]:
+                track = parse_playlist_item(item)
+                if track is None:
                     continue
-                all_tracks.append({
-                    "artist": track["artists"][0]["name"],
-                    "song_name": track["name"],
-                    "year": (track["album"].get("release_date") or "Unknown").split("-")[0],
-                    "url": track["external_urls"]["spotify"]
-                })
-
-
-            offset += current_limit
-
-            # **Wait to prevent API rate limiting**
-            time.sleep(0.2)  # Wait 200ms before the next request
-
-            # **Stop if there's no more data**
-            if results.get("next") is None:
-                break
-
-        except Exception as e:
-            log_error(app_state, f"Error during fetch: {e}")
-            break
-
-    log_info(app_state, f"Fetched {len(all_tracks)} tracks from the playlist.")
-    return all_tracks
-
-
-
+                yield track
+                yielded += 1
+                if not unlimited and yielded >= desired_count:
+                    return
+
+            # Top up the window, requesting only pages that may still be needed
+            while (len(in_flight) < 2 * max(1, workers) and next_offset < total
+                   and (unlimited or yielded + len(in_flight) * batch_size < desired_count)):
+                in_flight.append(executor.submit(fetch_playlist_page, sp, playlist_id, next_offset, batch_size, market))
+                next_offset += batch_size
+            # Futures finish in any order; always waiting on the oldest keeps playlist order
+            results = in_flight.popleft().result() if in_flight else None
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        throttled_after, retries_after, _ = rate_limiter.stats()
+        if retries_after > retries_before or throttled_after > throttled_before:
+            log_info(
+                app_state,
+                f"Rate limiting: {throttled_after - throttled_before:.1f}s spent throttled across requests, "
+                f"{retries_after - retries_before} retried requests"
+            )
+        log_info(app_state, f"Fetched {yielded} tracks from the playlist.")
+
+def fetch_playlist_tracks(
+        app_state,
+        sp,
+        playlist_url,
+        desired_count=100,
+        workers=PLAYLIST_FETCH_WORKERS,
+        market=SPOTIFY_MARKET):
+    """
+    Fetch track data from a Spotify playlist into a list.
+    desired_count can be an integer or the string 'all'. See iter_playlist_tracks.
+    """
+    return list(iter_playlist_tracks(app_state, sp, playlist_url, desired_count, workers, market))
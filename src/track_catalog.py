@@ -0,0 +1,194 @@
+import os
+import time
+import sqlite3
+from .constants import CATALOG_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    track_id TEXT PRIMARY KEY,
+    artist TEXT NOT NULL,
+    song_name TEXT NOT NULL,
+    year INTEGER,
+    url TEXT NOT NULL,
+    isrc TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_year ON tracks (year);
+CREATE INDEX IF NOT EXISTS idx_tracks_isrc ON tracks (isrc);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    playlist_id TEXT PRIMARY KEY,
+    name TEXT,
+    snapshot_id TEXT,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS import_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    playlist_id TEXT NOT NULL REFERENCES playlists (playlist_id),
+    snapshot_id TEXT,
+    track_limit TEXT,
+    market TEXT,
+    csv_path TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    track_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_import_runs_playlist ON import_runs (playlist_id, finished_at);
+
+CREATE TABLE IF NOT EXISTS run_tracks (
+    run_id INTEGER NOT NULL REFERENCES import_runs (run_id),
+    position INTEGER NOT NULL,
+    track_id TEXT NOT NULL REFERENCES tracks (track_id),
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_run_tracks_track ON run_tracks (track_id);
+"""
+
+def track_id_from_url(url):
+    """Spotify track ID from an open.spotify.com track URL."""
+    return url.rstrip("/").split("/")[-1].split("?")[0]
+
+def parse_year(year):
+    """Catalog year (int or None) from a card year string such as "1987" or "Unknown"."""
+    return int(year) if str(year).isdigit() else None
+
+def format_year(year):
+    return "Unknown" if year is None else str(year)
+
+class TrackCatalog:
+    """
+    Local SQLite catalog of imported tracks.
+
+    Each distinct track is stored once (keyed by Spotify track ID); an import
+    run records which tracks a playlist import produced, in order. Runs whose
+    finished_at is NULL were interrupted and are ignored by queries. Tracks are
+    written in batches, one transaction per batch.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def start_run(self, playlist_id, name, snapshot_id, track_limit, market, csv_path=None):
+        """Record the playlist and open a new import run; returns its run_id."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO playlists (playlist_id, name, snapshot_id, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (playlist_id) DO UPDATE SET "
+                "name = excluded.name, snapshot_id = excluded.snapshot_id, updated_at = excluded.updated_at",
+                (playlist_id, name, snapshot_id, now)
+            )
+            cursor = self.conn.execute(
+                "INSERT INTO import_runs (playlist_id, snapshot_id, track_limit, market, csv_path, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (playlist_id, snapshot_id, str(track_limit), market, csv_path, now)
+            )
+        return cursor.lastrowid
+
+    def add_run_tracks(self, run_id, tracks, first_position):
+        """Upsert a batch of track dicts and append them to run `run_id` from `first_position` (1-based)."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO tracks (track_id, artist, song_name, year, url, isrc) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (track_id) DO UPDATE SET artist = excluded.artist, song_name = excluded.song_name, "
+                "year = excluded.year, url = excluded.url, isrc = COALESCE(excluded.isrc, tracks.isrc)",
+                [
+                    (track_id_from_url(t["url"]), t["artist"], t["song_name"], parse_year(t["year"]), t["url"], t.get("isrc"))
+                    for t in tracks
+                ]
+            )
+            self.conn.executemany(
+                "INSERT INTO run_tracks (run_id, position, track_id) VALUES (?, ?, ?)",
+                [(run_id, first_position + i, track_id_from_url(t["url"])) for i, t in enumerate(tracks)]
+            )
+
+    def finish_run(self, run_id, track_count):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE import_runs SET finished_at = ?, track_count = ? WHERE run_id = ?",
+                (time.time(), track_count, run_id)
+            )
+
+    def list_runs(self):
+        """Finished import runs, newest first, with their playlist names."""
+        return self.conn.execute(
+            "SELECT r.run_id, r.playlist_id, p.name, r.track_limit, r.track_count, r.finished_at, r.csv_path "
+            "FROM import_runs r JOIN playlists p USING (playlist_id) "
+            "WHERE r.finished_at IS NOT NULL ORDER BY r.finished_at DESC"
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class CatalogDeck:
+    """
+    A deck read straight from the catalog, usable wherever a tracks CSV is:
+    either one import run (`run_id`, in playlist order) or a cross-playlist
+    query over every finished run, deduplicated by track (`year_from`,
+    `year_to` and/or `playlist_id`, ordered by year). Rows have the CSV columns.
+    """
+
+    def __init__(self, run_id=None, year_from=None, year_to=None, playlist_id=None, path=CATALOG_PATH):
+        self.run_id = run_id
+        self.year_from = year_from
+        self.year_to = year_to
+        self.playlist_id = playlist_id
+        self.path = path
+
+    def _query(self, columns):
+        """(sql, params) selecting `columns` for the deck's tracks, in deck order."""
+        if self.run_id is not None:
+            return (
+                f"SELECT {columns} FROM run_tracks rt JOIN tracks t USING (track_id) "
+                "WHERE rt.run_id = ? ORDER BY rt.position",
+                [self.run_id]
+            )
+        # Filter tracks by year first (indexed), then keep those in any finished run
+        conditions, params = [], []
+        if self.year_from is not None:
+            conditions.append("t.year >= ?")
+            params.append(self.year_from)
+        if self.year_to is not None:
+            conditions.append("t.year <= ?")
+            params.append(self.year_to)
+        run_filter = ""
+        if self.playlist_id is not None:
+            run_filter = " AND r.playlist_id = ?"
+            params.append(self.playlist_id)
+        conditions.append(
+            "EXISTS (SELECT 1 FROM run_tracks rt JOIN import_runs r USING (run_id) "
+            f"WHERE rt.track_id = t.track_id AND r.finished_at IS NOT NULL{run_filter})"
+        )
+        return (
+            f"SELECT {columns} FROM tracks t WHERE {' AND '.join(conditions)} "
+            "ORDER BY t.year, t.artist, t.song_name",
+            params
+        )
+
+    def count(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            sql, params = self._query("COUNT(*)")
+            return conn.execute(sql, params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def iter_records(self):
+        """Yield (serial_number, artist, song_name, year, url) tuples, numbered Card-001, ... in deck order."""
+        conn = sqlite3.connect(self.path)
+        try:
+            sql, params = self._query("t.artist, t.song_name, t.year, t.url")
+            for number, (artist, song_name, year, url) in enumerate(conn.execute(sql, params), start=1):
+                yield f"Card-{number:03}", artist, song_name, format_year(year), url
+        finally:
+            conn.close()
@@ -2,51 +2,143 @@ import os
 import csv
 from datetime import datetime
 from rich.progress import Progress
-from .spotify_utils import extract_id_from_url, fetch_playlist_tracks, fetch_playlist_name
+from .spotify_utils import extract_id_from_url, iter_playlist_tracks, fetch_playlist_metadata
+from .playlist_cache import PlaylistCache
+from .track_catalog import TrackCatalog
+from .binary_deck import BinaryDeckWriter, deck_path_for
+from .year_resolver import iter_with_original_years
+from .import_index import record_import
+from .constants import SPOTIFY_MARKET, ORIGINAL_YEAR_LOOKUP, CATALOG_BATCH_SIZE, IMPORTED_TRACKS_DIR
 from .logger import log_info, log_error, log_success
 
-def import_tracks(app_state, sp, playlist_url, track_count):
+def create_import_dir(track_count):
+    """
+    Create and return a new imported_tracks/<timestamp>_<track_count>/ directory.
+    Imports started in the same second (batch import) get a _2, _3, ... suffix;
+    os.mkdir fails if the directory exists, so concurrent imports never share one.
+    """
+    os.makedirs(IMPORTED_TRACKS_DIR, exist_ok=True)
+    base_path = os.path.join(IMPORTED_TRACKS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{track_count}")
+    output_dir, suffix = base_path, 1
+    while True:
+        try:
+            os.mkdir(output_dir)
+            return output_dir
+        except FileExistsError:
+            suffix += 1
+            output_dir = f"{base_path}_{suffix}"
+
+def import_tracks(app_state, sp, playlist_url, track_count, show_progress=True, metadata=None):
     """
     Import tracks from Spotify and save them to a CSV file in imported_tracks/<timestamp>_<track_count>/.
     The CSV file name will use the real playlist name if available.
+
+    One lightweight metadata request fetches the name, snapshot_id and size; if
+    the playlist is unchanged since it was last fetched, the tracks are served
+    from the local playlist cache instead of being downloaded again. A
+    `metadata` dict just fetched for this playlist (fetch_playlist_metadata)
+    is used instead of that request. Otherwise
+    tracks are streamed page by page into the CSV (and the cache), with the
+    progress bar and ETA following the actual download.
+
+    Every import is also recorded as a run in the track catalog, written in
+    batches of CATALOG_BATCH_SIZE tracks; the CSV is kept as an export. A
+    compact binary deck (binary_deck.py) is written next to the CSV for fast
+    loading during card generation.
+
+    Pass show_progress=False when several imports run at once: rich allows
+    only one live progress display at a time.
+
+    Returns (csv path, summary line, number of tracks written).
     """
     log_info(app_state, f"Importing tracks from {playlist_url} with limit={track_count}")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = os.path.join("imported_tracks", f"{timestamp}_{track_count}")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = create_import_dir(track_count)
 
-    # Attempt to fetch real playlist name
+    # Attempt to fetch real playlist name (and snapshot_id for the cache)
     playlist_id = extract_id_from_url(playlist_url)
     try:
-        real_name = fetch_playlist_name(app_state, sp, playlist_id)
+        if metadata is None:
+            metadata = fetch_playlist_metadata(app_state, sp, playlist_id)
+        real_name = metadata["name"]
+        snapshot_id = metadata["snapshot_id"]
+        metadata_total = metadata["total"]
     except Exception:
         real_name = playlist_id  # fallback if fail
+        snapshot_id = None
+        metadata_total = None
 
     # Sanitize name for filesystem
     safe_name = "".join(c for c in real_name if c.isalnum() or c in [' ', '_', '-']).rstrip()
     csv_filename = f"{safe_name}_tracks.csv"
     output_csv = os.path.join(output_dir, csv_filename)
 
-    # Fetch tracks
-    track_data = fetch_playlist_tracks(app_state, sp, playlist_url, desired_count=track_count)
-
-    # Then proceed with writing the CSV, etc.
-    with Progress() as progress:
-        task = progress.add_task("Importing tracks...", total=len(track_data))
-        with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Serial Number", "Artist", "Song Name", "Year", "Spotify URL"])
-            for i, track in enumerate(track_data):
-                writer.writerow([
-                    f"Card-{i + 1:03}",
-                    track["artist"],
-                    track["song_name"],
-                    track["year"],
-                    track["url"]
-                ])
-                progress.update(task, advance=1)
-
-    summary = f"{len(track_data)} tracks imported to {output_csv}"
-    log_success(app_state, summary)
-    return output_csv, summary
+    # Serve unchanged playlists from the cache, otherwise stream from Spotify (writing through to the cache)
+    unlimited = str(track_count).lower() == "all"
+    wanted = None if unlimited else int(track_count)
+    playlist_cache = PlaylistCache()
+    from_cache = bool(snapshot_id) and playlist_cache.has_tracks(playlist_id, snapshot_id, wanted, SPOTIFY_MARKET)
+
+    with Progress(disable=not show_progress) as progress:
+        if from_cache:
+            log_info(app_state, "Playlist unchanged since last fetch, using cached tracks")
+            cached_count = playlist_cache.load_metadata(playlist_id)["track_count"]
+            task = progress.add_task("Reading cached tracks...", total=min(cached_count, wanted or cached_count))
+            tracks = playlist_cache.iter_tracks(playlist_id, wanted)
+        else:
+            # Progress follows the network work: playlist items received, skipped ones included
+            expected = metadata_total if wanted is None or metadata_total is None else min(wanted, metadata_total)
+            task = progress.add_task("Fetching tracks...", total=expected)
+
+            def on_page(item_count, total):
+                progress.update(task, advance=item_count, total=total if wanted is None else min(wanted, total))
+
+            tracks = iter_playlist_tracks(app_state, sp, playlist_url, wanted, market=SPOTIFY_MARKET, on_page=on_page)
+            if snapshot_id:
+                tracks = playlist_cache.store_iter(playlist_id, snapshot_id, real_name, SPOTIFY_MARKET, tracks, wanted)
 
+        if ORIGINAL_YEAR_LOOKUP:
+            tracks = iter_with_original_years(app_state, tracks)
+
+        # Rows are written as tracks arrive, so memory stays flat for huge playlists.
+        # They go to a temp file that only becomes the CSV once every track is in,
+        # so a failed fetch never leaves a truncated import behind.
+        written = 0
+        batch = []
+        temp_csv = f"{output_csv}.tmp"
+        try:
+            # The binary deck is finalized last, so it is never older than its CSV
+            with BinaryDeckWriter(deck_path_for(output_csv)) as deck_writer, TrackCatalog() as catalog:
+                run_id = catalog.start_run(playlist_id, real_name, snapshot_id, track_count, SPOTIFY_MARKET, output_csv)
+                with open(temp_csv, "w", newline="", encoding="utf-8") as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(["Serial Number", "Artist", "Song Name", "Year", "Spotify URL"])
+                    for track in tracks:
+                        written += 1
+                        record = (f"Card-{written:03}", track["artist"], track["song_name"], track["year"], track["url"])
+                        writer.writerow(record)
+                        deck_writer.add(*record)
+                        batch.append(track)
+                        if len(batch) >= CATALOG_BATCH_SIZE:
+                            catalog.add_run_tracks(run_id, batch, written - len(batch) + 1)
+                            batch = []
+                        if from_cache:
+                            progress.update(task, advance=1)
+                if batch:
+                    catalog.add_run_tracks(run_id, batch, written - len(batch) + 1)
+                catalog.finish_run(run_id, written)
+                os.replace(temp_csv, output_csv)
+        except BaseException:
+            if os.path.exists(temp_csv):
+                os.remove(temp_csv)
+            try:
+                os.rmdir(output_dir)  # only if nothing else ended up in it
+            except OSError:
+                pass
+            raise
+        # Pages can overshoot a track limit and skipped items never become rows
+        progress.update(task, completed=progress.tasks[0].total)
+    record_import(output_csv, real_name, written, playlist_id)
+
+    summary = f"{written} tracks imported to {output_csv}"
+    log_success(app_state, summary)
+    return output_csv, summary, written
@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import sqlite3
+from .logger import log_info, log_error
+from .http_session import get_http_session
+from .rate_limiter import TokenBucket
+from .constants import (
+    YEAR_CACHE_PATH,
+    YEAR_CACHE_MISS_TTL_DAYS,
+    MUSICBRAINZ_API_URL,
+    MUSICBRAINZ_BATCH_SIZE,
+    MUSICBRAINZ_REQUESTS_PER_SECOND,
+    MUSICBRAINZ_USER_AGENT,
+    HTTP_TIMEOUT_SECONDS,
+)
+
+# Spotify's release_date belongs to the album a track sits on, so remasters and
+# compilations carry the reissue year. MusicBrainz knows each recording's
+# first-release-date and can look up many ISRCs in one search request.
+
+ISRC_PATTERN = re.compile(r"^[A-Z]{2}[A-Z0-9]{3}\d{7}$")
+
+# Tracks resolved together when streaming an import (many MusicBrainz batches each).
+YEAR_LOOKUP_CHUNK_SIZE = 1000
+
+# One pacer for every lookup in the process (all chunks of an import and
+# concurrent batch imports), so MusicBrainz never sees more than its limit.
+musicbrainz_pacer = TokenBucket(MUSICBRAINZ_REQUESTS_PER_SECOND, capacity=1)
+
+def normalize_text(value):
+    """Lowercase, drop bracketed suffixes ("(Remastered 2011)") and " - ..." version tags."""
+    value = re.sub(r"[\(\[].*?[\)\]]", "", value.lower())
+    value = value.split(" - ")[0]
+    return " ".join(re.sub(r"[^\w\s]", " ", value).split())
+
+def track_cache_keys(track):
+    """Cache keys for a track: its ISRC (if any) and its normalized artist + title."""
+    keys = []
+    isrc = (track.get("isrc") or "").upper()
+    if isrc:
+        keys.append(f"isrc:{isrc}")
+    keys.append(f"title:{normalize_text(track['artist'])}|{normalize_text(track['song_name'])}")
+    return keys
+
+class OriginalYearCache:
+    """
+    Persistent SQLite map from track keys (ISRC or artist + title) to original
+    release years. Lookups that found nothing are remembered too, and retried
+    after YEAR_CACHE_MISS_TTL_DAYS. Writes are committed on close().
+    """
+
+    def __init__(self, path=YEAR_CACHE_PATH, miss_ttl_days=YEAR_CACHE_MISS_TTL_DAYS):
+        self.path = path
+        self.miss_ttl = miss_ttl_days * 86400
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS original_years ("
+            " key TEXT PRIMARY KEY,"
+            " year INTEGER,"
+            " resolved_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        """Return (found, year): year may be None for a remembered miss."""
+        row = self.conn.execute("SELECT year, resolved_at FROM original_years WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        year, resolved_at = row
+        if year is None and time.time() - resolved_at > self.miss_ttl:
+            return False, None
+        return True, year
+
+    def put(self, key, year):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO original_years (key, year, resolved_at) VALUES (?, ?, ?)",
+            (key, year, time.time())
+        )
+
+    def put_earliest(self, key, year):
+        """Store `year` unless `key` already maps to an earlier one."""
+        found, cached = self.get(key)
+        if not found or cached is None or year < cached:
+            self.put(key, year)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def parse_year(date):
+    """Year of a "YYYY[-MM[-DD]]" date string, or None."""
+    if date and date[:4].isdigit():
+        return int(date[:4])
+    return None
+
+def fetch_isrc_years(isrcs, session, pacer):
+    """
+    Look up several ISRCs with one MusicBrainz recording search and return
+    {isrc: earliest first-release year} for the ones it knows.
+    """
+    pacer.acquire()
+    response = session.get(
+        f"{MUSICBRAINZ_API_URL}recording",
+        params={
+            "query": "isrc:(" + " OR ".join(isrcs) + ")",
+            "fmt": "json",
+            "limit": 100,
+        },
+        headers={"User-Agent": MUSICBRAINZ_USER_AGENT, "Accept": "application/json"},
+        timeout=HTTP_TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+
+    wanted = set(isrcs)
+    years = {}
+    for recording in response.json().get("recordings", []):
+        year = parse_year(recording.get("first-release-date"))
+        if year is None:
+            continue
+        for isrc in wanted.intersection(recording.get("isrcs", [])):
+            years[isrc] = min(year, years.get(isrc, year))
+    return years
+
+def resolve_original_years(app_state, tracks, cache_path=YEAR_CACHE_PATH, batch_size=MUSICBRAINZ_BATCH_SIZE):
+    """
+    Replace each track's "year" with its original release year when that is
+    earlier. Known tracks are served from the local cache; the rest are looked
+    up by ISRC in batches of `batch_size`. Tracks without an ISRC can only be
+    matched through the artist + title keys filled in by earlier lookups.
+    Lookup failures are logged and leave the Spotify year in place.
+    """
+    session = get_http_session()
+    from_cache = updated = 0
+
+    with OriginalYearCache(cache_path) as cache:
+        pending = {}  # isrc -> tracks still waiting for a lookup
+        resolved = {}
+        for track in tracks:
+            keys = track_cache_keys(track)
+            for key in keys:
+                found, year = cache.get(key)
+                # A remembered miss by title must not block a fresh ISRC lookup
+                if found and (year is not None or key.startswith("isrc:")):
+                    resolved[id(track)] = year
+                    from_cache += 1
+                    break
+            else:
+                if keys[0].startswith("isrc:"):
+                    pending.setdefault(keys[0][len("isrc:"):], []).append(track)
+
+        isrcs = [isrc for isrc in pending if ISRC_PATTERN.match(isrc)]
+        batches = [isrcs[i:i + batch_size] for i in range(0, len(isrcs), batch_size)]
+        if batches:
+            log_info(app_state, f"Looking up original years for {len(isrcs)} ISRCs in {len(batches)} requests")
+        for batch in batches:
+            try:
+                years = fetch_isrc_years(batch, session, musicbrainz_pacer)
+            except Exception as e:
+                log_error(app_state, f"Original year lookup failed, keeping Spotify years for {len(batch)} tracks: {e}")
+                continue
+            for isrc in batch:
+                year = years.get(isrc)
+                for track in pending[isrc]:
+                    resolved[id(track)] = year
+                    cache.put(f"isrc:{isrc}", year)
+                    if year is not None:
+                        cache.put_earliest(track_cache_keys(track)[-1], year)
+
+        for track in tracks:
+            year = resolved.get(id(track))
+            if year is None:
+                # Other versions of the same song resolved in this run
+                _, year = cache.get(track_cache_keys(track)[-1])
+            spotify_year = parse_year(track["year"])
+            if year is not None and (spotify_year is None or year < spotify_year):
+                track["year"] = str(year)
+                updated += 1
+
+    log_info(
+        app_state,
+        f"Original years: {updated} of {len(tracks)} tracks moved to an earlier year "
+        f"({from_cache} resolved from the local cache)"
+    )
+    return tracks
+
+def iter_with_original_years(app_state, tracks, chunk_size=YEAR_LOOKUP_CHUNK_SIZE):
+    """Streaming form of resolve_original_years: resolves `chunk_size` tracks at a time."""
+    chunk = []
+    for track in tracks:
+        chunk.append(track)
+        if len(chunk) >= chunk_size:
+            yield from resolve_original_years(app_state, chunk)
+            chunk = []
+    if chunk:
+        yield from resolve_original_years(app_state, chunk)